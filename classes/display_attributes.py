@@ -7,6 +7,7 @@ from classes.talent import Talent
 from classes.pet import Pet
 from classes.map import Map
 from utils.language import Language
+from utils.attribute_path import attribute_setter, nested_getter
 from utils.logger import Logger
 
 
@@ -401,17 +402,7 @@ class DisplayAttributes:
       Returns:
         updated obj with new attribute (ex: hero.display.talents.base.raw_list)
     """
-    attrs = attribute_path.split('.')
-    current = obj
-    for attr in attrs[:-1]:
-      if current is None:
-        return None
-      next_obj = getattr(current, attr, None)
-      if next_obj is None:
-        next_obj = Display()
-        setattr(current, attr, next_obj)
-      current = next_obj
-    setattr(current, attrs[-1], value)
+    return attribute_setter(attribute_path, Display)(obj, value)
 
   def _getattr_nested(self, obj: Any, attribute_path: str) -> Any:
     """ Get the value of a nested attribute with multiple nestings handler
@@ -421,18 +412,7 @@ class DisplayAttributes:
       Returns:
         value of the obj (ex: hero.display.talents.base.raw_list.value)
     """
-    try:
-      current = obj
-      for attr in attribute_path.split('.'):
-        if current is None:
-          return None
-        if isinstance(current, dict):
-          current = current.get(attr, None)
-        else:
-          current = getattr(current, attr, None)
-      return current
-    except (AttributeError, TypeError):
-      return None
+    return nested_getter(attribute_path)(obj)
     
   def _gain(self, a, b):
     if b == 0:
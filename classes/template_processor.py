@@ -1,13 +1,31 @@
 import re
-from typing import Dict, List, Any, Optional
-from collections import defaultdict
+import itertools
+import multiprocessing
+from typing import Dict, List, Any, Iterator, Optional, Tuple
+from collections import defaultdict, deque
 
 from classes.display_attributes import DisplayAttributes
 from utils.language import Language
+from utils.attribute_path import attribute_getter
+from utils.lru_cache import LRUCache
+from utils.wikitext import canonicalize
+
+ELEMENT_PATTERN = re.compile(r'\*\*([^*]+)\*\*')
+VALUE_PATTERN = re.compile(r'//([^/]+)//')
+
+# (processor, entities by object, languages) of the parallel generation, inherited by forked worker processes
+_generation_state = None
+
+
+def _render_generation_unit(unit: Tuple) -> Dict:
+  """ Worker process entry point (see TemplateProcessor.process_all_languages) """
+  processor, entities_by_object, languages = _generation_state
+  language_index, base_object, template_name, start, end = unit
+  return processor._render_unit(languages[language_index], entities_by_object.get(base_object), base_object, template_name, start, end)
 
 
 class TemplateProcessor:
-  def __init__(self, logger, elements_templates, pages_templates, all_languages, all_pets, all_heroes, no_map_processing, templates: Optional[List[str]] = None):
+  def __init__(self, logger, elements_templates, pages_templates, all_languages, all_pets, all_heroes, no_map_processing, templates: Optional[List[str]] = None, elements_cache_size: int = 4096):
     self.logger = logger
     self.elements_templates = elements_templates
     self.pages_templates = pages_templates
@@ -16,7 +34,13 @@ class TemplateProcessor:
     self.all_heroes = all_heroes
     self.no_map_processing = no_map_processing
     self.templates = [t.lower() for t in templates] if templates else None
+    self._compiled = {}
+    self._compiled_values = {}
+    self.elements_cache = LRUCache(maxsize=elements_cache_size)
+    self._displays = {}
+    self._prepared = {}
     self._index_templates()
+    self._compile_templates()
     
   def _index_templates(self):
     """Create a lookup index: base_object -> templates"""
@@ -27,6 +51,24 @@ class TemplateProcessor:
         continue
       self.templates_by_object[base_object].append((template_name, template_config))
 
+  def _compile_templates(self):
+    """ Parse once all templates of pages_templates.yml and elements_templates.yml (see _compile) """
+    for template_config in self.pages_templates.values():
+      if not isinstance(template_config, dict):
+        continue
+      for key in ['template', 'header', 'footer']:
+        if isinstance(template_config.get(key), str):
+          self._compile(template_config.get(key))
+      if isinstance(template_config.get('title'), str):
+        self._compile_values(template_config.get('title'))
+    for element_config in self.elements_templates.values():
+      if not isinstance(element_config, dict):
+        continue
+      for template in element_config.values():
+        if isinstance(template, str):
+          self._compile(template)
+          self._compile(self._strip_element_template(template))
+
   def process_all_templates(self, entities: List[Dict], language: Language) -> List[Dict]:
     """ Entry point to process all templates
       Args:
@@ -35,7 +77,10 @@ class TemplateProcessor:
       Returns:
         List[Dict] with processed template -> {'title': 'XX', 'content': 'XX'}
     """
-    results = []
+    return list(self.iter_all_templates(entities=entities, language=language))
+
+  def iter_all_templates(self, entities: List[Dict], language: Language) -> Iterator[Dict]:
+    """ Same as process_all_templates, pages are yielded as soon as they are processed """
     display = DisplayAttributes(logger=self.logger, elements_templates=self.elements_templates, language=language, all_languages=self.all_languages, all_heroes=self.all_heroes, all_pets=self.all_pets)
     display.init_template_processor(template_processor=self)
 
@@ -45,35 +90,85 @@ class TemplateProcessor:
       processed_entities_by_type[obj_type] = [display.prepare_display_data(entity=e) for e in entity_dict.get('list', [])]
 
     for base_object, processed_entities in processed_entities_by_type.items():
-      templates = self.templates_by_object.get(base_object)
-      if not templates:
-          continue
-      for template_name, template_config in templates:
-        if self.templates and template_name.lower() not in self.templates:
-          self.logger.info(f'Skipping {template_name} (not in --templates)')
-          continue
-        if self.no_map_processing and base_object in ['grid', 'map']:
-          self.logger.info(f'Skipping {template_name} (no map processing)')
-          continue
+      for template_name, template_config in self._templates_to_process(base_object):
         self.logger.info(f'Processing {template_name} template')
-        template_type = template_config.get('type')
-        if template_type == 'single':
-          processed = self._process_single_templates(template_name, template_config, processed_entities, language)
-          if processed:
-            results.extend(processed)
-        elif template_type == 'full list':
+        if template_config.get('type') == 'single':
+          yield from self._iter_single_templates(template_name, template_config, processed_entities, language)
+        else:
           processed = self._process_full_list_template(template_name, template_config, processed_entities, language)
           if processed:
-            results.append(processed)
-        else:
-          self.logger.error(f'type missing in {template_name}, please check pages_templates.yml and run again')
-    return results  
+            yield processed
+
+  def iter_all_languages(self, entities: List[Dict], languages: List[Language], workers: int = 1, chunk_size: int = 25, max_pending: Optional[int] = None) -> Iterator[Tuple[Language, Dict]]:
+    """ Process all templates in all languages on a pool of worker processes, pages are yielded as soon as they are processed
+      - work unit: one language x one template x one chunk of chunk_size entities
+      - workers are forked and share the entities loaded by this process, but display data (hero.display ...) prepared by a worker only exists in this worker,
+        so each worker prepares the entities of its chunks for the language of the unit
+      - pages are yielded in the same order as process_all_templates() one language after the other
+      - at most max_pending units are submitted ahead of the pages consumed by the caller, so generation waits for a slow consumer instead of holding all pages in memory
+      - runs iter_all_templates() one language at a time if workers <= 1 or if processes can't be forked
+      Args:
+        entities: List[Dict] of type {'object': object_name.lower(), 'list': list of objects (Hero, Heroclass ...)}
+        languages: List of Language instances to process
+        workers: number of worker processes
+        chunk_size: number of entities processed by one work unit
+        max_pending: number of units rendered ahead of the caller (default: 2 units per worker)
+      Returns:
+        iterator of (language, processed template -> {'title': 'XX', 'content': 'XX'})
+    """
+    if workers <= 1 or 'fork' not in multiprocessing.get_all_start_methods():
+      for language in languages:
+        for page in self.iter_all_templates(entities=entities, language=language):
+          yield language, page
+      return
+
+    global _generation_state
+    entities_by_object = {entity_dict.get('object'): entity_dict.get('list', []) for entity_dict in entities}
+    units = []
+    for language_index, language in enumerate(languages):
+      for base_object, object_entities in entities_by_object.items():
+        for template_name, template_config in self._templates_to_process(base_object):
+          if not self._check_template_data(template_name=template_name, template_config=template_config, language=language):
+            continue
+          for start in range(0, len(object_entities), chunk_size):
+            units.append((language_index, base_object, template_name, start, start + chunk_size))
+    self.logger.info(f'Processing {len(units)} work units ({len(languages)} languages) with {workers} processes')
+
+    rows = []
+    pending = deque()
+    units_left = iter(units)
+    _generation_state = (self, entities_by_object, languages)
+    try:
+      with multiprocessing.get_context('fork').Pool(processes=workers) as pool:
+        for unit in itertools.islice(units_left, max_pending or 2 * workers):
+          pending.append((unit, pool.apply_async(_render_generation_unit, (unit,))))
+        while pending:
+          (language_index, base_object, template_name, start, end), result = pending.popleft()
+          rendered = result.get()
+          next_unit = next(units_left, None)
+          if next_unit is not None:
+            pending.append((next_unit, pool.apply_async(_render_generation_unit, (next_unit,))))
+          self.elements_cache.hits += rendered.get('cache_hits')
+          self.elements_cache.misses += rendered.get('cache_misses')
+          if rendered.get('pages') is not None:
+            for page in rendered.get('pages'):
+              yield languages[language_index], page
+            continue
+          rows.extend(rendered.get('rows'))
+          if rendered.get('frame'):
+            head, tail = rendered.get('frame')
+            yield languages[language_index], {'title': rendered.get('title'), 'content': canonicalize('\n'.join(head + ['\n'.join(rows)] + tail))}
+            rows = []
+    finally:
+      _generation_state = None
 
   """ class private methods for template processing """
 
   def _process_single_templates(self, template_name: str, template_config: Dict, entities: List[Any], language: Language) -> List[Dict[str, str]]:
     """ Process template for all heroes one by one -> returns one page by hero """
-    results = []
+    return list(self._iter_single_templates(template_name, template_config, entities, language))
+
+  def _iter_single_templates(self, template_name: str, template_config: Dict, entities: List[Any], language: Language) -> Iterator[Dict[str, str]]:
     template_data = self._check_template_data(template_name=template_name, template_config=template_config, language=language)
     if template_data:
       for entity in entities:
@@ -81,11 +176,9 @@ class TemplateProcessor:
         processed_content = self._process_template_content(template_data.get('template_content'), base_object, language)
         template_title = template_data.get('template_title')
         if '//' in template_title:
-          template_title = self._replace_direct_values(content=template_title, base_object=base_object, language=language)
+          template_title = self._render_values(self._compile_values(template_title), base_object, language)
         full_content = self._build_full_content(template_data.get('template_title'), template_config, processed_content, base_object, language)
-        results.append({'title': template_title, 'content': full_content})
-      return results
-    return None
+        yield {'title': template_title, 'content': full_content}
   
   def _process_full_list_template(self, template_name: str, template_config: Dict, entities: List[Any], language: Language) -> Dict[str, str]:
     """ Process template for all heroes all at once -> return an unique page for all heroes """
@@ -99,9 +192,66 @@ class TemplateProcessor:
       combined_content = '\n'.join(all_rows)
       template_title = template_data.get('template_title')
       if '//' in template_title:
-        template_title = self._replace_direct_values(content=template_title, base_object=base_object, language=language)
+        template_title = self._render_values(self._compile_values(template_title), base_object, language)
       full_content = self._build_full_content(template_data.get('template_title'), template_config, combined_content, base_object, language)
       return {'title': template_title, 'content': full_content}
+
+  def _templates_to_process(self, base_object: str) -> List[Tuple[str, Dict]]:
+    """ Templates of base_object to process (selected with --templates and map processing, with a known type) """
+    templates = []
+    for template_name, template_config in self.templates_by_object.get(base_object, []):
+      if self.templates and template_name.lower() not in self.templates:
+        self.logger.info(f'Skipping {template_name} (not in --templates)')
+        continue
+      if self.no_map_processing and base_object in ['grid', 'map']:
+        self.logger.info(f'Skipping {template_name} (no map processing)')
+        continue
+      if template_config.get('type') not in ['single', 'full list']:
+        self.logger.error(f'type missing in {template_name}, please check pages_templates.yml and run again')
+        continue
+      templates.append((template_name, template_config))
+    return templates
+
+  def _render_unit(self, language: Language, entities: List[Any], base_object: str, template_name: str, start: int, end: int) -> Dict:
+    """ Process one template for entities[start:end] in a worker process (see process_all_languages)
+      Returns:
+        {'pages': [...]} for a single template
+        {'rows': [...], 'title': XX, 'frame': (header parts, footer parts)} for a full list template, title and frame only for the chunk with the last entity
+        with element templates cache hits and misses in this unit
+    """
+    cache_hits, cache_misses = self.elements_cache.hits, self.elements_cache.misses
+    template_config = self.pages_templates.get(template_name)
+    template_data = self._check_template_data(template_name=template_name, template_config=template_config, language=language)
+    chunk = entities[start:end]
+    self._prepare_display_data(chunk, language)
+    if template_config.get('type') == 'single':
+      rendered = {'pages': self._process_single_templates(template_name, template_config, chunk, language)}
+    else:
+      rendered = {'rows': [], 'title': None, 'frame': None}
+      for entity in chunk:
+        base_object = self._get_base_object(entity, template_data.get('base_object_path'))
+        rendered['rows'].append(self._process_template_content(template_data.get('template_content'), base_object, language))
+      if end >= len(entities):
+        template_title = template_data.get('template_title')
+        if '//' in template_title:
+          template_title = self._render_values(self._compile_values(template_title), base_object, language)
+        rendered['title'] = template_title
+        rendered['frame'] = self._build_page_frame(template_data.get('template_title'), template_config, base_object, language)
+    rendered['cache_hits'] = self.elements_cache.hits - cache_hits
+    rendered['cache_misses'] = self.elements_cache.misses - cache_misses
+    return rendered
+
+  def _prepare_display_data(self, entities: List[Any], language: Language):
+    """ Prepare display data of entities for language, unless this process already did it for the same language """
+    display = self._displays.get(language.code)
+    if display is None:
+      display = DisplayAttributes(logger=self.logger, elements_templates=self.elements_templates, language=language, all_languages=self.all_languages, all_heroes=self.all_heroes, all_pets=self.all_pets)
+      display.init_template_processor(template_processor=self)
+      self._displays[language.code] = display
+    for entity in entities:
+      if self._prepared.get(id(entity)) != language.code:
+        display.prepare_display_data(entity=entity)
+        self._prepared[id(entity)] = language.code
     
   def _check_template_data(self, template_name: str, template_config: Dict, language: Language) -> Dict|None:
     """ Checks for template integrity (mandatory elements) """
@@ -120,34 +270,34 @@ class TemplateProcessor:
     return {'base_object_path': base_object_path, 'template_content': template_content, 'template_title': template_title}
   
   def _build_full_content(self, template_title: str, template_config: Dict, main_content: str, base_object: Any, language: Language) -> str:
-    """ Adds header and footer to page content """
+    """ Adds header and footer to page content, returns canonical wikitext (see utils.wikitext.canonicalize) """
+    head, tail = self._build_page_frame(template_title, template_config, base_object, language)
+    return canonicalize('\n'.join(head + [main_content] + tail))
+
+  def _build_page_frame(self, template_title: str, template_config: Dict, base_object: Any, language: Language) -> Tuple[List[str], List[str]]:
+    """ Processed parts around page content: header before it, footer and interlanguage links after it """
     header = template_config.get('header', '')
     footer = template_config.get('footer', '')
-    parts = []
+    head = []
+    tail = []
     if header:
       processed_header = self._process_template_content(header, base_object, language)
-      parts.append(processed_header)
-    parts.append(main_content)
+      head.append(processed_header)
     if footer:
       processed_footer = self._process_template_content(footer, base_object, language)
-      parts.append(processed_footer)
+      tail.append(processed_footer)
     for l in self.all_languages:
       if l != language:
-        translated_title = self._replace_direct_values(content=template_title, base_object=base_object, language=l)
-        parts.append(f'[[{l.code}:{translated_title}]]')
-    return '\n'.join(parts)
+        translated_title = self._render_values(self._compile_values(template_title), base_object, l)
+        tail.append(f'[[{l.code}:{translated_title}]]')
+    return head, tail
   
   def _get_base_object(self, object, base_object_path: str):
       """ Get base object for template processing with multiple nestings handler """
       if '.' not in base_object_path:
         return object
       else:
-        obj = object
-        for attr in base_object_path.split('.'):
-          obj = getattr(obj, attr, None)
-          if obj is None:
-            break
-        return obj
+        return attribute_getter(base_object_path)(object)
       
   def transform_attribute_to_element(self, attribute: str, which_template: str, language: Language) -> str:
     """ Transforms an attribute into the template which_template, taken from elements_templates.yml
@@ -157,81 +307,184 @@ class TemplateProcessor:
       language: the language to translate into
     Returns:
       template str filled with attribute and translated attribute if needed
+      (cached for str and number attributes, the result only depends on the value, the template and the language)
       """
-    template = self._getitem_nested(data=self.elements_templates, key_path=which_template).replace('\n', '').replace('<br />', '').replace('<br>', '').strip()
+    if isinstance(attribute, (str, int, float)):
+      key = (type(attribute), attribute, which_template, language.code)
+      element = self.elements_cache.get(key)
+      if element is None:
+        element = self._transform_attribute_to_element(attribute, which_template, language)
+        self.elements_cache.put(key, element)
+      return element
+    return self._transform_attribute_to_element(attribute, which_template, language)
+
+  def _transform_attribute_to_element(self, attribute: Any, which_template: str, language: Language) -> str:
+    template = self._strip_element_template(self._getitem_nested(data=self.elements_templates, key_path=which_template))
     if not template:
       self.logger.error(f'No template {which_template} found in elements_templates.yml')
       return ''
     return self._process_template_content(template=template, base_object=attribute, language=language)
+
+  def _strip_element_template(self, template: str) -> str:
+    return template.replace('\n', '').replace('<br />', '').replace('<br>', '').strip()
   
   def _process_template_content(self, template: str, base_object: Any, language: Language) -> str:
-    """ Process template content by replacing tags with elements or values """
-    processed = template
-    processed = self._replace_element_templates(processed, base_object, language)
-    processed = self._replace_direct_values(processed, base_object, language)
-    processed = self._clean_empty_lines(processed)
-    return processed
-  
-  def _replace_element_templates(self, content: str, base_object: Any, language: Language) -> str:
-    """ Replace **template_name** patterns with elements_templates """
-    pattern = r'\*\*([^*]+)\*\*'
-    
-    def replace_element_template(match):
-      template_path = match.group(1)
-      parts = template_path.split('.')
-      if len(parts) != 2:
-        self.logger.error(f'template error: too much nesting in {template_path}')
-        return match.group(0)
-      element_name, template_type = parts
-      if element_name not in self.elements_templates:
-        self.logger.error(f'template error: {element_name} not in elements_templates.yml')
-        return match.group(0)
-      element_config = self.elements_templates[element_name]
-      element_template = element_config.get(template_type, '')
-      if not element_template:
-        self.logger.error(f'template error: no {element_template} in {element_name} template')
-        return match.group(0)
-      return self._process_template_content(element_template, base_object, language)
-    
-    return re.sub(pattern, replace_element_template, content)
-  
-  def _replace_direct_values(self, content: str, base_object: Any, language: Language) -> str:
-    """ Replace //attribute// patterns with values """
-    pattern = r'//([^/]+)//'
-    
-    def replace_value(match):
-      attribute_path = match.group(1)
+    """ Process template content by replacing tags with elements or values
+      **element.type** tags are replaced first (each element template is processed on its own), then //attribute// tags in the result, then empty lines are removed
+    """
+    parts, tokens = self._compiled.get(template) or self._compile(template)
+    elements = [self._render_element(part, base_object, language) for part in parts if not isinstance(part, str)]
+    if tokens is not None and all(self._is_inert(element) for element in elements):
+      processed = ''.join([token(base_object, language, elements) for token in tokens])
+    else:
+      elements_iter = iter(elements)
+      processed = ''.join(part if isinstance(part, str) else next(elements_iter) for part in parts)
+      processed = self._replace_direct_values(processed, base_object, language)
+    return self._clean_empty_lines(processed)
+
+  """ template compilation: templates are parsed once, rendering only calls the compiled tokens """
+
+  def _compile(self, template: str) -> Tuple[List, List|None]:
+    """ Parse a template into literal text, **element.type** tags and //attribute// tags
+      Returns:
+        (parts, tokens):
+          - parts: literal str and element tags, as found in the template
+          - tokens: functions (base_object, language, rendered elements) -> str, to join in this order
+            None if //attribute// tags can't be found before elements are rendered (a tag spans over an element)
+    """
+    parts = []
+    position = 0
+    for match in ELEMENT_PATTERN.finditer(template):
+      parts.append(template[position:match.start()])
+      parts.append(self._compile_element(match))
+      position = match.end()
+    parts.append(template[position:])
+    compiled = (parts, self._compile_tokens(parts))
+    self._compiled[template] = compiled
+    return compiled
+
+  def _compile_element(self, match: re.Match) -> Tuple[str|None, str, str|None]:
+    """ Element tag -> (element template, raw tag, error message) """
+    template_path = match.group(1)
+    parts = template_path.split('.')
+    if len(parts) != 2:
+      return None, match.group(0), f'template error: too much nesting in {template_path}'
+    element_name, template_type = parts
+    if element_name not in self.elements_templates:
+      return None, match.group(0), f'template error: {element_name} not in elements_templates.yml'
+    element_template = self.elements_templates[element_name].get(template_type, '')
+    if not element_template:
+      return None, match.group(0), f'template error: no {element_template} in {element_name} template'
+    return element_template, match.group(0), None
+
+  def _compile_tokens(self, parts: List) -> List|None:
+    """ Find //attribute// tags in literal parts, if no tag spans over an element
+      an element is seen as one non slash character: tags found this way are the ones found after rendering
+      as long as the rendered element is not empty, has no '//' and doesn't start or end with '/' (see _is_inert)
+    """
+    placeholder = ''
+    element_offsets = []
+    for part in parts:
+      if isinstance(part, str):
+        placeholder += part
+      else:
+        element_offsets.append(len(placeholder))
+        placeholder += '_'
+    for match in VALUE_PATTERN.finditer(placeholder):
+      if any(match.start() <= offset < match.end() for offset in element_offsets):
+        return None
+    tokens = []
+    element_index = 0
+    for part in parts:
+      if isinstance(part, str):
+        tokens.extend(self._parse_values(part))
+      else:
+        tokens.append(self._compile_element_slot(element_index))
+        element_index += 1
+    return tokens
+
+  def _compile_values(self, content: str) -> List:
+    """ Compiled tokens of a template without element tags (titles) """
+    if content not in self._compiled_values:
+      self._compiled_values[content] = self._parse_values(content)
+    return self._compiled_values[content]
+
+  def _parse_values(self, content: str) -> List:
+    """ Split content into tokens for literal text and //attribute// tags """
+    tokens = []
+    position = 0
+    for match in VALUE_PATTERN.finditer(content):
+      if match.start() > position:
+        tokens.append(self._compile_text(content[position:match.start()]))
+      tokens.append(self._compile_value(match.group(1), match.group(0)))
+      position = match.end()
+    if position < len(content):
+      tokens.append(self._compile_text(content[position:]))
+    return tokens
+
+  def _compile_text(self, text: str):
+    return lambda base_object, language, elements: text
+
+  def _compile_element_slot(self, index: int):
+    return lambda base_object, language, elements: elements[index]
+
+  def _compile_value(self, attribute_path: str, raw: str):
+    """ Token for an attribute tag, the raw tag is kept if the value can't be found """
+    if attribute_path.startswith('translated.'):
+      attr_name = attribute_path.replace('translated.', '')
+      if (attr_name.startswith("'") and attr_name.endswith("'")) or (attr_name.startswith('"') and attr_name.endswith('"')):
+        expression = attr_name[1:-1]
+        def translate_expression(base_object, language, elements):
+          try:
+            return language.translate(expression)
+          except Exception:
+            self.logger.error(f'attribute error exception: no {attribute_path} found')
+            return raw
+        return translate_expression
+      getter, translated = attribute_getter(attr_name), True
+    else:
+      getter, translated = attribute_getter(attribute_path), False
+
+    def attribute_value(base_object, language, elements):
       try:
-        if attribute_path.startswith('translated.'):
-          attr_name = attribute_path.replace('translated.', '')
-          if (attr_name.startswith("'") and attr_name.endswith("'")) or (attr_name.startswith('"') and attr_name.endswith('"')):
-            return language.translate(attr_name[1:-1])
-          else:
-            if hasattr(base_object, '__dict__'):
-              value = self._getattr_nested(base_object, attr_name)
-            else:
-              value = base_object
-            if value:
-              return language.translate(value)
-            self.logger.error(f'attribute error: no {attribute_path} found ({base_object.name}, {language.name})')
-            return match.group(0)
+        if hasattr(base_object, '__dict__'):
+          value = getter(base_object)
         else:
-          if hasattr(base_object, '__dict__'):
-            value = self._getattr_nested(base_object, attribute_path)
-          else:
-            value = base_object
-          if value is not None:
-            return str(value)
-          self.logger.error(f'attribute error: no {attribute_path} found ({base_object.name}, {language.name})')
-          return match.group(0)
+          value = base_object
+        if translated:
+          if value:
+            return language.translate(value)
+        elif value is not None:
+          return str(value)
+        self.logger.error(f'attribute error: no {attribute_path} found ({base_object.name}, {language.name})')
+        return raw
       except Exception:
         self.logger.error(f'attribute error exception: no {attribute_path} found')
-        return match.group(0)
-    
-    return re.sub(pattern, replace_value, content)
+        return raw
+    return attribute_value
+
+  def _is_inert(self, rendered: str) -> bool:
+    """ Rendered element which can't create or hide //attribute// tags around it """
+    return rendered != '' and '//' not in rendered and rendered[0] != '/' and rendered[-1] != '/'
+
+  def _render_element(self, element: Tuple[str|None, str, str|None], base_object: Any, language: Language) -> str:
+    element_template, raw, error = element
+    if error:
+      self.logger.error(error)
+      return raw
+    return self._process_template_content(element_template, base_object, language)
+
+  def _render_values(self, tokens: List, base_object: Any, language: Language) -> str:
+    return ''.join([token(base_object, language, None) for token in tokens])
+
+  def _replace_direct_values(self, content: str, base_object: Any, language: Language) -> str:
+    """ Replace //attribute// patterns with values """
+    return self._render_values(self._parse_values(content), base_object, language)
   
   def _clean_empty_lines(self, content: str) -> str:
     """ Remove lines that only contain empty values like '<br />( + + )' """
+    if '=' not in content:
+      return content
     lines = content.split('\n')
     cleaned_lines = []
     
@@ -258,15 +511,7 @@ class TemplateProcessor:
       Returns:
         value of the obj (ex: hero.display.talents.base.raw_list.value)
     """
-    try:
-      current = obj
-      for attr in attribute_path.split('.'):
-        current = getattr(current, attr, None)
-        if current is None:
-          return None
-      return current
-    except (AttributeError, TypeError):
-      return None
+    return attribute_getter(attribute_path)(obj)
     
   def _getitem_nested(self, data: dict, key_path: str) -> Any:
     """Get the value of a nested key with multiple nestings handler
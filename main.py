@@ -2,8 +2,14 @@ import sys
 import os
 import argparse
 import copy
+import queue
+import asyncio
+import itertools
+import threading
 from dataclasses import dataclass, field
 from typing import List
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 
 from glob import glob
 from utils.config import Config
@@ -12,10 +18,16 @@ from utils.mongodb import Mongo
 from utils.backup import DatabaseBackupManager
 from utils.sheets import Sheets
 from utils.wiki import Wiki
+from utils.async_wiki import AsyncWiki
+from utils.wiki_pool import WikiPool
+from utils.ledger import Ledger
+from utils.journal import EditJournal
 from utils.yml import Yml
 from utils.misc import *
 from utils.language import Language
 from utils.drive import Drive
+from utils.upload_queue import UploadQueue
+from utils.wikitext import canonicalize
 
 from classes.hero import Hero, match_images_with_heroes
 from classes.pet import Pet, match_images_with_pets
@@ -37,6 +49,10 @@ class AppContext:
     self.lang = None
     self.mongodb = None
     self.drive = None
+    self.wikis = None
+    self.ledger = None
+    self.journal = None
+    self.elements_cache = None
     
     self.playsome_data = None
     self.languages = []
@@ -48,6 +64,7 @@ class AppContext:
     self.maps = []
     self.grids = []
     self.generated_pages = []
+    self.pages_count = 0
     self.images = []
     self.heroclasses = []
     self.talents = []   
@@ -100,6 +117,8 @@ class ArgsClass:
   save: bool = False
   maps: bool = False
   templates: List[str] = field(default_factory=list)
+  wiki_url: str = None
+  resume: bool = False
   
 def parse_arguments(ctx: AppContext) -> ArgsClass:
   """ Parse command line arguments """
@@ -110,6 +129,8 @@ def parse_arguments(ctx: AppContext) -> ArgsClass:
 
   template_help = 'update only listed templates :\n' + '\n'.join([f'  - {k.lower()}' for k in ctx.pages_templates.keys()]) + '\nexemple: py main.py --template "hero 3a" "hero gear"'
   parser.add_argument('--templates', nargs='*', help=template_help)
+  parser.add_argument('--resume', action='store_true', help='resume an interrupted run: only compare and update the pages still pending in the edit journal (no generation, unless the run was interrupted while generating pages)')
+  parser.add_argument('--wiki-url', help='use another wiki url than WIKI_URL from .env\nexemple: py main.py --wiki-url http://127.0.0.1:8089/ (local stand-in started with py -m utils.wiki_standin)')
   try:
     parsed_args = parser.parse_args()
     if parsed_args.templates:
@@ -121,7 +142,7 @@ def parse_arguments(ctx: AppContext) -> ArgsClass:
         exit(1)
   except SystemExit:
     exit(0)
-  return ArgsClass(force=parsed_args.force, save=parsed_args.save, maps=parsed_args.maps, templates=parsed_args.templates or [])
+  return ArgsClass(force=parsed_args.force, save=parsed_args.save, maps=parsed_args.maps, templates=parsed_args.templates or [], wiki_url=parsed_args.wiki_url, resume=parsed_args.resume)
 
 
 def init_classes(ctx: AppContext):
@@ -132,6 +153,9 @@ def init_classes(ctx: AppContext):
   ctx.yml = Yml(logger=ctx.logger)
   ctx.lang = Language(logger=ctx.logger)
   ctx.drive = Drive(logger=ctx.logger, config=ctx.config)
+  ctx.wikis = WikiPool(config=ctx.config, logger=ctx.logger)
+  ctx.ledger = Ledger(logger=ctx.logger, path=ctx.config.WIKI_LEDGER_FILE)
+  ctx.journal = EditJournal(logger=ctx.logger, path=ctx.config.WIKI_JOURNAL_FILE)
 
 
 def init_mongodb_connection(ctx: AppContext, args: ArgsClass) -> bool:
@@ -289,130 +313,346 @@ def compare_actual_data_to_stored_data(ctx: AppContext, args: ArgsClass) -> bool
   
 
 def generate_pages_contents(ctx: AppContext, args: ArgsClass) -> bool:
-  """ Generate pages contents translated in all known languages """
+  """ Generate pages contents translated in all known languages
+    ctx.generated_pages is a generator: pages are rendered while the first ones are already compared and edited (see compare_and_update_wiki_pages)
+  """
   ctx.logger.info('Generating pages contents')
-  ctx.generated_pages = []
   ctx.init_data_to_process()
   processor = TemplateProcessor(logger=ctx.logger, elements_templates=ctx.elements_templates, pages_templates=ctx.pages_templates, all_languages=ctx.languages, all_heroes=ctx.heroes, all_pets=ctx.pets, no_map_processing=args.maps, templates=args.templates)
+  ctx.elements_cache = processor.elements_cache
 
-  for language in ctx.languages:
-    ctx.logger.info(f'Language : {language.name}')
-    to_update = processor.process_all_templates(entities=ctx.data_to_process, language=language)
-    if not to_update:
-      ctx.logger.warning(f'No content generated for language: {language.name}')
-      continue
-    if isinstance(to_update, list):
-      for upd in to_update:
-        ctx.generated_pages.append({'lang_code': language.code, 'title': upd.get('title'), 'content': upd.get('content')})
-    else:
-      ctx.generated_pages.append({'lang_code': language.code, 'title': to_update.get('title'), 'content': to_update.get('content')})
-  
-  if not ctx.generated_pages:
+  pages = stream_generated_pages(ctx, processor)
+  first_page = next(pages, None)
+  if first_page is None:
     ctx.logger.error('No pages content generated')
     return False
-  
-  ctx.generated_pages.sort(key=lambda x:(x['lang_code'], x['title']))
-  pages_count = len(ctx.generated_pages)
+  ctx.generated_pages = itertools.chain([first_page], pages)
+  return True
+
+
+def stream_generated_pages(ctx: AppContext, processor: TemplateProcessor):
+  """ Yield generated pages ({'lang_code': XX, 'title': XX, 'content': XX}) as soon as they are rendered """
+  pages_by_lang = defaultdict(int)
+  for language, page in processor.iter_all_languages(entities=ctx.data_to_process, languages=ctx.languages, workers=ctx.config.GENERATION_WORKERS):
+    pages_by_lang[language.code] += 1
+    yield {'lang_code': language.code, 'title': page.get('title'), 'content': page.get('content')}
+
+  for language in ctx.languages:
+    if not pages_by_lang[language.code]:
+      ctx.logger.warning(f'No content generated for language: {language.name}')
+  pages_count = sum(pages_by_lang.values())
   lang_count = len(ctx.languages)
   ctx.logger.info(f'Generated content for {int(pages_count/lang_count)} pages in {lang_count} different languages (total {pages_count} pages)')
+
+
+def load_pending_pages(ctx: AppContext) -> bool:
+  """ Load pages still pending in the edit journal of an interrupted run, instead of generating them """
+  ctx.generated_pages = ctx.journal.pending()
+  if not ctx.generated_pages:
+    ctx.logger.info('No pending page found in edit journal')
+  else:
+    ctx.logger.info(f'{len(ctx.generated_pages)} pending pages loaded from edit journal')
   return True
 
 
-def compare_and_update_wiki_pages(ctx: AppContext, args: ArgsClass) -> bool:
-  """ Compare generated content with wiki pages content and update if different """
-  lang_code = ctx.generated_pages[0]['lang_code']
-  wiki = Wiki(config=ctx.config, logger=ctx.logger, lang_code=lang_code)
-  wiki_login = wiki.initialize()
-  if not wiki_login:
-    ctx.logger.error('Failed to initialize wiki connection')
-    return False
-  
-  edit_count = 0
-  for i, page in enumerate(ctx.generated_pages):
-    if page.get('lang_code') != lang_code:
-      if not wiki.switch_language(page.get('lang_code')):
-        ctx.logger.error(f'Could not switch to language {page.get('lang_code')}')
-        continue
-      lang_code = page.get('lang_code')
-    wiki_page_content = wiki.get_page_content(page.get('title'))
-    if wiki_page_content is False:
-      ctx.logger.error(f'Failed to get content for {page.get('title')}')
-      return False
-    
-    current_content = wiki_page_content.rstrip() if wiki_page_content is not None else None
-    new_content = page.get('content').rstrip()
-    if current_content is None:
-      ctx.logger.info(f"Page {page.get('title')} doesn't exist")
-    if current_content != new_content:
-      edit_count += 1
-      ctx.logger.info(f"New content: edit {lang_code}/{page.get('title')}...")
-      success = wiki.edit_request(title=page.get('title'), content=new_content)
-      if not success:
-        ctx.logger.error(f"Failed to edit {page.get('title')}")
+async def fetch_revids_and_sha1(wiki: AsyncWiki, revids_titles: List[str], sha1_titles: List[str]) -> tuple:
+  """ Get revids of revids_titles and SHA1 of sha1_titles with concurrent queries
+    Returns:
+      (revids dict, sha1 dict) as returned by Wiki.get_pages_revids and Wiki.get_pages_sha1 (empty dict if no title, None on error)
+  """
+  return tuple(await asyncio.gather(wiki.get_pages_revids(revids_titles), wiki.get_pages_sha1(sha1_titles)))
+
+
+def find_pages_to_update(ctx: AppContext, wiki: Wiki, pages: List[dict]) -> List[dict]|None:
+  """ Compare generated pages with wiki pages, from the cheapest check to the most expensive one:
+    - pages already pushed with the same content (ledger) only need a revid check to catch human edits
+    - other pages are compared with revision SHA1 (queried at the same time as revids, pages edited since last update are queried next)
+    - content is only downloaded for pages with a different SHA1, then compared in canonical form (see utils.wikitext.canonicalize)
+    Returns:
+      list of pages to edit (with 'wiki_content' if it was downloaded), None if wiki couldn't be read
+  """
+  lang_code = wiki.lang_code
+  ledger_pages = ctx.ledger.get_many(lang_code, [p.get('title') for p in pages])
+  pages_sha1 = {p.get('title'): content_sha1(p.get('content')) for p in pages}
+  in_ledger = []
+  to_check = []
+  for page in pages:
+    if ledger_pages.get(page.get('title'), {}).get('content_sha1') == pages_sha1[page.get('title')]:
+      in_ledger.append(page)
+    else:
+      to_check.append(page)
+
+  if in_ledger:
+    ctx.logger.info(f'Fetching {len(in_ledger)} {lang_code} pages revids...')
+  if to_check:
+    ctx.logger.info(f'Fetching {len(to_check)} {lang_code} pages SHA1...')
+  wiki_revids, wiki_sha1 = asyncio.run(fetch_revids_and_sha1(AsyncWiki(wiki=wiki), [p.get('title') for p in in_ledger], [p.get('title') for p in to_check]))
+  if wiki_revids is None or wiki_sha1 is None:
+    return None
+
+  changed = [p for p in in_ledger if wiki_revids.get(p.get('title')) != ledger_pages[p.get('title')].get('revid')]
+  if changed:
+    ctx.logger.info(f'{len(changed)} {lang_code} pages were edited since last update, fetching their SHA1...')
+    changed_sha1 = wiki.get_pages_sha1([p.get('title') for p in changed])
+    if changed_sha1 is None:
+      return None
+    wiki_sha1.update(changed_sha1)
+    to_check.extend(changed)
+
+  to_update = []
+  to_read = []
+  in_sync = {}
+  for page in to_check:
+    title = page.get('title')
+    revision = wiki_sha1.get(title)
+    if revision is None:
+      ctx.logger.info(f"Page {title} doesn't exist")
+      to_update.append(page)
+    elif revision.get('sha1') != pages_sha1[title]:
+      to_read.append(page)
+    else:
+      in_sync[title] = {'content_sha1': pages_sha1[title], 'revid': revision.get('revid')}
+
+  if to_read:
+    ctx.logger.info(f'Fetching {len(to_read)} {lang_code} pages contents with a different SHA1...')
+    wiki_contents = wiki.get_pages_content([p.get('title') for p in to_read])
+    if wiki_contents is None:
+      return None
+    for page in to_read:
+      title = page.get('title')
+      current_content = wiki_contents.get(title)
+      if current_content is None or canonicalize(current_content) != canonicalize(page.get('content')):
+        to_update.append(dict(page, wiki_content=current_content))
       else:
-        ctx.logger.info(f"{page.get('title')} successfully edited")
+        in_sync[title] = {'content_sha1': pages_sha1[title], 'revid': wiki_sha1[title].get('revid')}
+
+  ctx.ledger.set_many(lang_code, in_sync)
+  return to_update
+
+
+class PagesProgress:
+  """ Thread-safe progress counters shared by the per-language edit workers """
+  def __init__(self, logger, total: int, log_every: int = 50):
+    self.logger = logger
+    self.total = total
+    self.log_every = log_every
+    self.checked = 0
+    self.edited = 0
+    self.checked_by_lang = defaultdict(int)
+    self.edited_by_lang = defaultdict(int)
+    self._lock = threading.Lock()
+
+  def add_total(self, count: int):
+    """ More pages to check (pages are counted as they are generated) """
+    with self._lock:
+      self.total += count
+
+  def add(self, lang_code: str, edited: bool):
+    with self._lock:
+      self.checked += 1
+      self.checked_by_lang[lang_code] += 1
+      if edited:
+        self.edited += 1
+        self.edited_by_lang[lang_code] += 1
+      if self.checked % self.log_every == 0:
+        by_lang = ', '.join(f'{l}: {c}' for l, c in sorted(self.checked_by_lang.items()))
+        self.logger.info(f'Progression: {self.checked}/{self.total} pages checked ({by_lang}), {self.edited} edited')
+
+
+def edit_language_pages(ctx: AppContext, lang_code: str, account: int, pages: List[dict], progress: PagesProgress):
+  """ Worker: edit pages of one language wiki with one bot account """
+  wiki = ctx.wikis.get_editor(lang_code, account)
+  if not wiki:
+    ctx.logger.error(f'Could not connect to {lang_code} wiki to edit {len(pages)} pages')
+    return
+  for page in pages:
+    ctx.logger.info(f"New content: edit {lang_code}/{page.get('title')}...")
+    success = wiki.edit_page(title=page.get('title'), content=page.get('content').rstrip(), current_content=page.get('wiki_content'))
+    if not success:
+      ctx.logger.error(f"Failed to edit {lang_code}/{page.get('title')}")
     else:
+      ctx.logger.info(f"{lang_code}/{page.get('title')} successfully edited")
+      ctx.ledger.set(lang_code, page.get('title'), content_sha1(page.get('content')), success.get('newrevid'))
+      ctx.journal.done(lang_code, page.get('title'), page.get('content'))
+    progress.add(lang_code, bool(success))
+
+
+def update_language_pages(ctx: AppContext, lang_code: str, pages: List[dict], progress: PagesProgress) -> bool:
+  """ Worker: compare and update all generated pages of one language wiki
+    Edits are spread over bot accounts (one worker per account), a page always goes to the same account
+  """
+  wiki = ctx.wikis.get(lang_code)
+  if not wiki:
+    ctx.logger.error(f'Could not connect to {lang_code} wiki')
+    return True
+  to_update = find_pages_to_update(ctx, wiki, pages)
+  if to_update is None:
+    ctx.logger.error(f'Failed to compare pages for language {lang_code}')
+    return False
+
+  to_update_titles = set(p.get('title') for p in to_update)
+  for page in pages:
+    if page.get('title') not in to_update_titles:
       ctx.logger.info(f"Same content: skip {lang_code}/{page.get('title')}")
-    
-    if i % 50 == 0:
-      ctx.logger.info(f'Progression: {i+1}/{len(ctx.generated_pages)} pages checked, {edit_count} edited')
-  ctx.logger.info(f'{edit_count} pages edited out of {len(ctx.generated_pages)} checked')
+      ctx.journal.done(lang_code, page.get('title'), page.get('content'))
+      progress.add(lang_code, False)
+
+  pages_by_account = defaultdict(list)
+  for page in to_update:
+    pages_by_account[ctx.wikis.account_for(page.get('title'))].append(page)
+  if len(pages_by_account) <= 1:
+    for account, account_pages in pages_by_account.items():
+      edit_language_pages(ctx, lang_code, account, account_pages, progress)
+    return True
+  with ThreadPoolExecutor(max_workers=len(pages_by_account), thread_name_prefix=f'edit-{lang_code}') as executor:
+    futures = [executor.submit(edit_language_pages, ctx, lang_code, account, account_pages, progress) for account, account_pages in pages_by_account.items()]
+    for future in futures:
+      future.result()
   return True
 
 
+def consume_language_pages(ctx: AppContext, lang_code: str, batches: queue.Queue, progress: PagesProgress, results: dict):
+  """ Worker: compare and update batches of pages of one language wiki as they come, until a None batch
+    after a failure, next batches are only drained (their pages stay pending in the edit journal)
+  """
+  success = True
+  while True:
+    pages = batches.get()
+    if pages is None:
+      break
+    if not success:
+      continue
+    try:
+      success = update_language_pages(ctx, lang_code, pages, progress)
+    except Exception as e:
+      ctx.logger.error(f'Unexpected error while updating {lang_code} pages : {e}')
+      success = False
+  results[lang_code] = success
+
+
+class PagesDispatcher:
+  """ Send pages by batches to one compare/edit worker thread per language (see consume_language_pages)
+    - each page is planned in the edit journal as soon as it is added, journal is written to disk before a batch is sent
+    - a batch is sent once batch_size pages of a language are generated (or at the end), sorted by title
+    - batch_size defaults to the query batch size of the language wiki (500 titles with apihighlimits), so each check of a batch is one wiki query
+    - each language queue holds at most max_batches batches: generation waits for a language worker which is late, so not all pages are held in memory
+  """
+  def __init__(self, ctx: AppContext, progress: PagesProgress, plan: bool = True, batch_size: int = None, max_batches: int = 4):
+    self.ctx = ctx
+    self.progress = progress
+    self.plan = plan
+    self.batch_size = batch_size
+    self.batch_sizes = {}
+    self.max_batches = max_batches
+    self.pending = defaultdict(list)
+    self.workers = {}
+    self.results = {}
+
+  def add(self, page: dict):
+    if self.plan:
+      self.ctx.journal.plan([page], sync=False)
+    lang_code = page.get('lang_code')
+    self.pending[lang_code].append(page)
+    if len(self.pending[lang_code]) >= self._batch_size(lang_code):
+      self._send(lang_code, self.pending.pop(lang_code))
+
+  def _batch_size(self, lang_code: str) -> int:
+    if lang_code not in self.batch_sizes:
+      wiki = None if self.batch_size else self.ctx.wikis.get(lang_code)
+      self.batch_sizes[lang_code] = self.batch_size or (wiki.batch_size if wiki else 50)
+    return self.batch_sizes[lang_code]
+
+  def _send(self, lang_code: str, pages: List[dict]):
+    if self.plan:
+      self.ctx.journal.sync()
+    pages.sort(key=lambda p: p.get('title'))
+    self.progress.add_total(len(pages))
+    if lang_code not in self.workers:
+      batches = queue.Queue(maxsize=self.max_batches)
+      worker = threading.Thread(target=consume_language_pages, args=(self.ctx, lang_code, batches, self.progress, self.results), name=f'wiki-{lang_code}', daemon=True)
+      worker.start()
+      self.workers[lang_code] = (batches, worker)
+    self.workers[lang_code][0].put(pages)
+
+  def close(self) -> bool:
+    """ Send last batches and wait for all language workers
+      Returns:
+        True if no language worker failed
+    """
+    for lang_code, pages in list(self.pending.items()):
+      self._send(lang_code, pages)
+    self.pending.clear()
+    for batches, _ in self.workers.values():
+      batches.put(None)
+    for _, worker in self.workers.values():
+      worker.join()
+    return all(self.results.get(lang_code, False) for lang_code in self.workers)
+
+
+def compare_and_update_wiki_pages(ctx: AppContext, args: ArgsClass) -> bool:
+  """ Compare generated content with wiki pages content and update if different, one worker per language
+    pages are taken from ctx.generated_pages as they are generated and dispatched by batches to the language workers
+  """
+  if not args.resume:
+    ctx.journal.start()
+  progress = PagesProgress(logger=ctx.logger, total=0)
+  dispatcher = PagesDispatcher(ctx=ctx, progress=progress, plan=not args.resume)
+  try:
+    for page in ctx.generated_pages:
+      dispatcher.add(page)
+    if not args.resume:
+      ctx.journal.generated()
+  finally:
+    success = dispatcher.close()
+    ctx.pages_count = progress.total
+
+  for lang_code in sorted(dispatcher.workers):
+    ctx.logger.info(f'{lang_code}: {progress.edited_by_lang[lang_code]} pages edited out of {progress.checked_by_lang[lang_code]} checked')
+  ctx.logger.info(f'{progress.edited} pages edited out of {progress.checked} checked')
+  ctx.journal.finish()
+  return success
+
+
 def compare_and_update_files(ctx: AppContext):
   """ Compare drive files with wiki files, upload those which are not already in the wiki and update FilesPage in all wikis """
 
   all_wikis = []
   for lang in ctx.languages:
-    wiki = Wiki(config=ctx.config, logger=ctx.logger, lang_code=lang.code)
-    if not wiki.initialize():
-      ctx.logger.error(f'Failed to initialize {lang.code} wiki connection')
+    wiki = ctx.wikis.get(lang.code)
+    if not wiki:
       return False
     all_wikis.append(wiki)
-  source_wiki = next((w for w in all_wikis if w.lang_code == 'en'), None)
+  source_wiki = ctx.wikis.get('en')
   if not source_wiki:
     ctx.logger.error('Source wiki "en" not found')
     return False
 
-  file_list_str = source_wiki.get_page_content('FilesPage')
-  if file_list_str is False:
-      ctx.logger.error(f'Failed to get content for FilesPage {lang.code}')
-      return False
-  images_list = file_list_str.split(' ') if file_list_str else []
+  images_list = source_wiki.list_all_images()
+  if images_list is None:
+    ctx.logger.error('Failed to retrieve image list from source wiki')
+    return False
 
+  uploads = UploadQueue(logger=ctx.logger, wiki=source_wiki, drive=ctx.drive, workers=ctx.config.WIKI_UPLOAD_WORKERS)
   match_images_with_heroes(ctx=ctx, images=[{'name': i} for i in images_list if 'Portrait' in i], attribute='wiki')
   for hero in ctx.heroes:
     hero.portrait = f'{hero.name.replace(" ", "_")}_Portrait.png'
     if hero.file.drive and not hero.file.wiki:
       ctx.logger.info(f'---> New file found for {hero.name}')
-      file_path = ctx.drive.download_file(hero.file.drive)
-      if not file_path:
-        return False        
-      if not source_wiki.upload_file(filepath=file_path, wiki_filename=hero.portrait):
-        return False
+      uploads.add(wiki_filename=hero.portrait, drive_file=hero.file.drive)
       
   match_images_with_pets(ctx=ctx, images=[{'name': i} for i in images_list if 'Portrait' in i], attribute='wiki')
   for pet in ctx.pets:
     pet.portrait = f'{pet.special_art_id if pet.special_art_id else pet.name.replace(" ", "_")}_Portrait.png'
     if pet.file.drive and not pet.file.wiki:
       ctx.logger.info(f'---> New file found for {pet.name}')
-      file_path = ctx.drive.download_file(pet.file.drive)
-      if not file_path:
-        return False        
-      if not source_wiki.upload_file(filepath=file_path, wiki_filename=pet.portrait):
-        return False
+      uploads.add(wiki_filename=pet.portrait, drive_file=pet.file.drive)
       
   match_images_with_traits(ctx=ctx, images=[{'name': i} for i in images_list if 'Trait' in i], attribute='wiki')
   for trait in ctx.traits:
     trait.portrait = f'Trait{trait.special_art_id if trait.special_art_id else trait.name.replace(" ", "")}.png'
     if trait.file.drive and not trait.file.wiki:
       ctx.logger.info(f'---> New file found for {trait.name}')
-      file_path = ctx.drive.download_file(trait.file.drive)
-      if not file_path:
-        return False        
-      if not source_wiki.upload_file(filepath=file_path, wiki_filename=trait.portrait):
-        return False
+      uploads.add(wiki_filename=trait.portrait, drive_file=trait.file.drive)
 
   match_images_with_maps(ctx=ctx, images=[{'name': i} for i in images_list if 'Spire' in i], attribute='wiki_exists')
   for map in ctx.maps:
@@ -423,24 +663,18 @@ def compare_and_update_files(ctx: AppContext):
         should_upload = idx in [1, 2] and not image['wiki_exists']
       if should_upload:
         ctx.logger.info(f'---> New file found for {image['filename']}')
-        if not source_wiki.upload_file(filepath=image['filepath'], wiki_filename=image['filename']):
-          return False
+        uploads.add(wiki_filename=image['filename'], filepath=image['filepath'])
         
   for grid in ctx.grids:
-    ctx.logger.info(f'---> Trying to upload file for {map.name}')
-    if not source_wiki.upload_file(filepath=grid.filepath, wiki_filename=grid.filename):
-      return False
+    ctx.logger.info(f'---> Trying to upload file for {grid.filename}')
+    uploads.add(wiki_filename=grid.filename, filepath=grid.filepath)
+
+  if not uploads.run():
+    return False
   
-  all_source_files = source_wiki.list_all_images()
-  if not all_source_files:
-    ctx.logger.error('Failed to retrieve image list from source wiki')
+  if not update_files_page(ctx, source_wiki, all_wikis):
     return False
 
-  for wiki in all_wikis:
-    if not wiki.update_files_page(file_list=all_source_files):
-      return False
-    ctx.logger.info(f'FilesPage updated in {wiki.lang_code} wiki')
-
   heroes_without_portrait = [h.name for h in ctx.heroes if h.portrait is None]
   if heroes_without_portrait:
     ctx.logger.warning(f'---> Heroes found without portrait : {', '.join(heroes_without_portrait)}')
@@ -453,10 +687,51 @@ def compare_and_update_files(ctx: AppContext):
   
   return True
 
+def update_files_page(ctx: AppContext, source_wiki: Wiki, all_wikis: List[Wiki]) -> bool:
+  """ Update FilesPage in all wikis with the files of the source wiki, if it changed (no change if the wiki has no file) """
+  file_list = list(source_wiki.images_index.keys())
+  if not file_list:
+    ctx.logger.info('No files found in the wiki: FilesPage unchanged')
+    return True
+  files_page_content = source_wiki.build_files_page_content(file_list=file_list)
+  if files_page_content is None:
+    return False
+  files_page = {'title': 'FilesPage', 'content': files_page_content}
+  for wiki in all_wikis:
+    to_update = find_pages_to_update(ctx, wiki, [files_page])
+    if to_update is None:
+      ctx.logger.error(f'Failed to compare FilesPage in {wiki.lang_code} wiki')
+      return False
+    if not to_update:
+      ctx.logger.info(f'FilesPage unchanged in {wiki.lang_code} wiki')
+      continue
+    success = wiki.edit_request(title=files_page.get('title'), content=files_page_content)
+    if not success:
+      return False
+    ctx.ledger.set(wiki.lang_code, files_page.get('title'), content_sha1(files_page_content), success.get('newrevid'))
+    ctx.logger.info(f'FilesPage updated in {wiki.lang_code} wiki')
+  return True
+
+
 def cleanup(ctx: AppContext, args: ArgsClass):
   """ Cleanup before close """
   if ctx.mongodb and not args.no_save:
     ctx.mongodb.close()
+  if ctx.ledger:
+    ctx.ledger.close()
+  if ctx.journal:
+    ctx.journal.close()
+  if ctx.elements_cache:
+    cache = ctx.elements_cache.summary()
+    ctx.logger.info(f'Element templates cache: {cache['hits']} hits, {cache['misses']} misses ({cache['hit_rate']:.0%} hit rate), {cache['size']}/{cache['maxsize']} entries')
+  if ctx.wikis:
+    retries = ctx.wikis.retry_policy.summary()
+    ctx.logger.info(f'Wiki requests: {retries['retries']} retries, {retries['wait_time']:.0f}s waited, {retries['throttled']} slowed down by the server ({retries['throttle_time']:.0f}s), {retries['given_up']} given up, {retries['breaker_opened']} circuit breaker openings')
+    pages = ctx.pages_count or None
+    ctx.wikis.metrics.log_summary(ctx.logger, pages=pages)
+    metrics_file = ctx.wikis.metrics.save(ctx.logger, pages=pages)
+    if metrics_file:
+      ctx.logger.info(f'Wiki requests metrics saved in {metrics_file}')
   
   for file in os.listdir('temp'):
     file_path = os.path.join('temp', file)
@@ -466,9 +741,10 @@ def cleanup(ctx: AppContext, args: ArgsClass):
 
 def main():
   """ Main function """
-  ctx = AppContext()
-
+  ctx = None
+  args = None
   try:
+    ctx = AppContext()
     init_classes(ctx)
 
     if not load_files(ctx):
@@ -476,6 +752,9 @@ def main():
       sys.exit(1)
 
     args = parse_arguments(ctx)
+    if args.wiki_url:
+      ctx.config.WIKI_URL = args.wiki_url if args.wiki_url.endswith('/') else f'{args.wiki_url}/'
+      ctx.logger.info(f'Using wiki url {ctx.config.WIKI_URL}')
     
     if not init_mongodb_connection(ctx, args):
       ctx.logger.error('Exit due to MongoDB connexion failure -> restart with --no_save if it doesn\'t matter ;)')
@@ -497,12 +776,20 @@ def main():
       ctx.logger.error('Exit due to failure to load files from shared drive')
       sys.exit(1)
 
-    if not compare_actual_data_to_stored_data(ctx, args):
-      sys.exit(1)
-    
-    if not generate_pages_contents(ctx, args):
-      ctx.logger.error('Exit due to failure to generate pages contents')
-      sys.exit(1)
+    if args.resume and ctx.journal.is_complete():
+      if not load_pending_pages(ctx):
+        ctx.logger.error('Exit due to failure to load edit journal')
+        sys.exit(1)
+    else:
+      if args.resume:
+        ctx.logger.warning('Previous run was interrupted while generating pages: all pages are generated again (pages already updated are found in sync)')
+        args.resume = False
+      elif not compare_actual_data_to_stored_data(ctx, args):
+        sys.exit(1)
+
+      if not generate_pages_contents(ctx, args):
+        ctx.logger.error('Exit due to failure to generate pages contents')
+        sys.exit(1)
     
     #ctx.generated_pages = [c for c in ctx.generated_pages if c.get('title') == 'Traits' or c.get('title') == 'Rasgos' or c.get('title') == 'Caractéristiques'] # FOR TESTS
 
@@ -519,7 +806,7 @@ def main():
   except SystemExit as e:
     return
   except Exception as e:
-    if ctx.logger:
+    if ctx and ctx.logger:
       ctx.logger.error(f'Unexpected error: {str(e)}')
     else:
       print(f'Error: {str(e)}')
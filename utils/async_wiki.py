@@ -0,0 +1,77 @@
+import asyncio
+
+from utils.wiki import Wiki
+
+
+class AsyncWiki:
+  """ Asyncio client with the same surface as Wiki, to pipeline reads and writes
+    - reads run concurrently (up to read_concurrency at once), each one on a read session of the wiki (see Wiki._read_request)
+    - writes (login, edits, uploads) run one at a time and keep to the edit rate limiter of the wiki
+    Requests are sent by the synchronous Wiki in worker threads, so both clients share login, limiters and retry policy
+
+    exemple:
+      wiki = AsyncWiki(config=config, logger=logger, lang_code='fr')
+      if await wiki.initialize():
+        sha1, content = await asyncio.gather(wiki.get_pages_sha1(titles), wiki.get_page_content('Traits'))
+  """
+  def __init__(self, config=None, logger=None, lang_code='en', wiki: Wiki = None, read_concurrency: int = None, **wiki_kwargs):
+    self.wiki = wiki or Wiki(config=config, logger=logger, lang_code=lang_code, **wiki_kwargs)
+    self.logger = self.wiki.logger
+    self.lang_code = self.wiki.lang_code
+    self.read_concurrency = read_concurrency or self.wiki.read_concurrency
+    self._read_semaphore = None
+    self._write_lock = None
+
+  def _get_semaphore(self) -> asyncio.Semaphore:
+    if self._read_semaphore is None:
+      self._read_semaphore = asyncio.Semaphore(self.read_concurrency)
+    return self._read_semaphore
+
+  def _get_write_lock(self) -> asyncio.Lock:
+    if self._write_lock is None:
+      self._write_lock = asyncio.Lock()
+    return self._write_lock
+
+  async def _read(self, func, *args, **kwargs):
+    async with self._get_semaphore():
+      return await asyncio.to_thread(func, *args, **kwargs)
+
+  async def _write(self, func, *args, **kwargs):
+    async with self._get_write_lock():
+      return await asyncio.to_thread(func, *args, **kwargs)
+
+  async def initialize(self) -> bool:
+    """ Initialise wiki connexion (see Wiki.initialize) """
+    return await self._write(self.wiki.initialize)
+
+  async def get_page_content(self, title):
+    """ Get the content of a wiki page (see Wiki.get_page_content) """
+    return await self._read(self.wiki.get_page_content, title)
+
+  async def get_pages_content(self, titles: list[str]) -> dict|None:
+    """ Get the content of many wiki pages at once (see Wiki.get_pages_content) """
+    return await self._read(self.wiki.get_pages_content, titles)
+
+  async def get_pages_sha1(self, titles: list[str]) -> dict|None:
+    """ Get last revision SHA1 and id of many wiki pages at once (see Wiki.get_pages_sha1) """
+    return await self._read(self.wiki.get_pages_sha1, titles)
+
+  async def get_pages_revids(self, titles: list[str]) -> dict|None:
+    """ Get last revision id of many wiki pages at once (see Wiki.get_pages_revids) """
+    return await self._read(self.wiki.get_pages_revids, titles)
+
+  async def list_all_images(self) -> list|None:
+    """ Return a list of all image filenames from the wiki (see Wiki.list_all_images) """
+    return await self._read(self.wiki.list_all_images)
+
+  async def edit_request(self, title, content, summary=None, minor=False, section=None):
+    """ Edit a wiki page or one of its sections (see Wiki.edit_request) """
+    return await self._write(self.wiki.edit_request, title, content, summary, minor, section)
+
+  async def edit_page(self, title, content, current_content=None, summary=None, minor=False):
+    """ Edit a wiki page, only its changed section if possible (see Wiki.edit_page) """
+    return await self._write(self.wiki.edit_page, title, content, current_content, summary, minor)
+
+  async def upload_file(self, filepath, wiki_filename: str, ignore_warnings=True) -> bool:
+    """ Upload a file to the wiki (see Wiki.upload_file) """
+    return await self._write(self.wiki.upload_file, filepath, wiki_filename, ignore_warnings)
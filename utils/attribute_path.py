@@ -0,0 +1,61 @@
+from functools import lru_cache
+from operator import attrgetter
+from typing import Any, Callable
+
+# Dotted attribute paths (ex: 'display.talents.base.raw_list') are compiled once into accessors, instead of being split at each access
+
+
+@lru_cache(maxsize=4096)
+def attribute_getter(attribute_path: str) -> Callable[[Any], Any]:
+  """ Compiled getter for a dotted attribute path
+    Returns:
+      getter(obj) -> value of obj.attr1.attr2..., None if an attribute is missing or None on the way
+  """
+  get = attrgetter(attribute_path)
+  def getter(obj: Any) -> Any:
+    try:
+      return get(obj)
+    except (AttributeError, TypeError):
+      return None
+  return getter
+
+
+@lru_cache(maxsize=4096)
+def nested_getter(attribute_path: str) -> Callable[[Any], Any]:
+  """ Same as attribute_getter, a step in a dict gets the dict key instead of an attribute """
+  attrs = tuple(attribute_path.split('.'))
+  def getter(obj: Any) -> Any:
+    try:
+      current = obj
+      for attr in attrs:
+        if current is None:
+          return None
+        if isinstance(current, dict):
+          current = current.get(attr, None)
+        else:
+          current = getattr(current, attr, None)
+      return current
+    except (AttributeError, TypeError):
+      return None
+  return getter
+
+
+@lru_cache(maxsize=4096)
+def attribute_setter(attribute_path: str, factory: Callable[[], Any]) -> Callable[[Any, Any], None]:
+  """ Compiled setter for a dotted attribute path, missing (or None) intermediate attributes are created with factory()
+    Returns:
+      setter(obj, value) -> sets obj.attr1.attr2... = value
+  """
+  *parents, last = attribute_path.split('.')
+  def setter(obj: Any, value: Any):
+    current = obj
+    for attr in parents:
+      if current is None:
+        return None
+      next_obj = getattr(current, attr, None)
+      if next_obj is None:
+        next_obj = factory()
+        setattr(current, attr, next_obj)
+      current = next_obj
+    setattr(current, last, value)
+  return setter
@@ -1,4 +1,5 @@
 import os
+import re
 from dotenv import load_dotenv
 
 class Config:
@@ -23,4 +24,28 @@ class Config:
 
     self.WIKI_URL = os.getenv('WIKI_URL')
     self.WIKI_USERNAME = os.getenv('WIKI_USERNAME')
-    self.WIKI_PWD = os.getenv('WIKI_PWD')
\ No newline at end of file
+    self.WIKI_PWD = os.getenv('WIKI_PWD')
+    # extra bot accounts to spread edits: WIKI_USERNAME_1 / WIKI_PWD_1, WIKI_USERNAME_2 / WIKI_PWD_2...
+    self.WIKI_ACCOUNTS = [(self.WIKI_USERNAME, self.WIKI_PWD)] + self._get_extra_wiki_accounts()
+    self.WIKI_LEDGER_FILE = os.getenv('WIKI_LEDGER_FILE', os.path.join('cache', 'wiki_ledger.db'))
+    self.WIKI_JOURNAL_FILE = os.getenv('WIKI_JOURNAL_FILE', os.path.join('cache', 'edit_journal.jsonl'))
+    self.WIKI_SESSION_CACHE_FILE = os.getenv('WIKI_SESSION_CACHE_FILE', os.path.join('cache', 'wiki_sessions.json'))
+    self.WIKI_READ_CONCURRENCY = int(os.getenv('WIKI_READ_CONCURRENCY', 4))
+    self.WIKI_UPLOAD_WORKERS = int(os.getenv('WIKI_UPLOAD_WORKERS', 3))
+    self.GENERATION_WORKERS = int(os.getenv('GENERATION_WORKERS', os.cpu_count() or 1))
+
+  def _get_extra_wiki_accounts(self) -> list:
+    """ Extra bot accounts from numbered WIKI_USERNAME_n / WIKI_PWD_n variables (left empty = no account), ordered by number
+      Raises:
+        ValueError if an account misses its username or password
+    """
+    numbers = sorted({int(match.group(2)) for match in (re.fullmatch(r'WIKI_(USERNAME|PWD)_(\d+)', key) for key in os.environ) if match})
+    accounts = []
+    for n in numbers:
+      username, password = os.getenv(f'WIKI_USERNAME_{n}'), os.getenv(f'WIKI_PWD_{n}')
+      if not username and not password:
+        continue
+      if not username or not password:
+        raise ValueError(f'Wiki account {n}: both WIKI_USERNAME_{n} and WIKI_PWD_{n} must be set')
+      accounts.append((username, password))
+    return accounts
\ No newline at end of file
@@ -0,0 +1,129 @@
+import os
+import json
+import threading
+from typing import Dict, List
+
+from utils.misc import content_sha1
+
+
+class EditJournal:
+  """ Append-only journal (one json per line) of the wiki pages to compare and update, to resume an interrupted run
+    - 'planned' lines are written for generated pages as soon as they are generated (content included)
+    - a 'generated' line is written once all pages of the run are generated and planned
+    - 'done' lines are written as soon as a page is found in sync or successfully edited
+    Pages are identified by (lang_code, title, content SHA1)
+  """
+  def __init__(self, logger, path: str):
+    self.logger = logger
+    self.path = path
+    self._lock = threading.Lock()
+    self._file = None
+
+  def _key(self, lang_code: str, title: str, sha1: str) -> tuple:
+    return (lang_code, title, sha1)
+
+  def _append(self, entries: List[Dict], sync: bool = False):
+    with self._lock:
+      if self._file is None:
+        folder = os.path.dirname(self.path)
+        if folder:
+          os.makedirs(folder, exist_ok=True)
+        self._file = open(self.path, 'a', encoding='utf-8')
+      for entry in entries:
+        self._file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+      self._file.flush()
+      if sync:
+        os.fsync(self._file.fileno())
+
+  def start(self, pages: List[Dict] = None):
+    """ Start a new journal with pages planned (more pages can be planned later with plan())
+      Args:
+        pages: list of {'lang_code': XX, 'title': XX, 'content': XX}
+    """
+    self.close()
+    if os.path.exists(self.path):
+      os.remove(self.path)
+    self.plan(pages or [])
+
+  def plan(self, pages: List[Dict], sync: bool = True):
+    """ Add planned pages to the journal
+      Args:
+        pages: list of {'lang_code': XX, 'title': XX, 'content': XX}
+        sync: if False, lines are only flushed (see sync())
+    """
+    self._append([{'status': 'planned', 'lang_code': p.get('lang_code'), 'title': p.get('title'), 'sha1': content_sha1(p.get('content')), 'content': p.get('content')} for p in pages], sync=sync)
+
+  def sync(self):
+    """ Write journal lines to disk """
+    with self._lock:
+      if self._file is not None:
+        os.fsync(self._file.fileno())
+
+  def generated(self):
+    """ Mark the end of pages generation: all pages of the run are planned """
+    self._append([{'status': 'generated'}], sync=True)
+
+  def done(self, lang_code: str, title: str, content: str):
+    """ Mark a page as in sync with the wiki """
+    self._append([{'status': 'done', 'lang_code': lang_code, 'title': title, 'sha1': content_sha1(content)}])
+
+  def _read(self) -> tuple:
+    """ Read the journal
+      Returns:
+        (planned pages by key, set of done keys, True if the 'generated' line was found)
+    """
+    planned = {}
+    done = set()
+    generated = False
+    if not os.path.exists(self.path):
+      return planned, done, generated
+    with self._lock, open(self.path, encoding='utf-8') as file:
+      for line_number, line in enumerate(file, start=1):
+        try:
+          entry = json.loads(line)
+        except json.JSONDecodeError:
+          self.logger.warning(f'Journal {self.path}: line {line_number} is incomplete, ignored')
+          continue
+        key = self._key(entry.get('lang_code'), entry.get('title'), entry.get('sha1'))
+        if entry.get('status') == 'planned':
+          planned[key] = {'lang_code': entry.get('lang_code'), 'title': entry.get('title'), 'content': entry.get('content')}
+        elif entry.get('status') == 'done':
+          done.add(key)
+        elif entry.get('status') == 'generated':
+          generated = True
+    return planned, done, generated
+
+  def pending(self) -> List[Dict]:
+    """ Returns:
+      list of planned pages not done yet ({'lang_code': XX, 'title': XX, 'content': XX}), in journal order
+    """
+    planned, done, _ = self._read()
+    return [page for key, page in planned.items() if key not in done]
+
+  def is_complete(self) -> bool:
+    """ Returns:
+      False if the run of this journal was interrupted before all its pages were generated (its pending pages aren't all planned)
+    """
+    if not os.path.exists(self.path):
+      return True
+    return self._read()[2]
+
+  def finish(self) -> bool:
+    """ Delete the journal if all planned pages are done
+      Returns:
+        True if the journal was deleted
+    """
+    pending = self.pending()
+    self.close()
+    if pending:
+      self.logger.warning(f'{len(pending)} pages still pending in {self.path} -> restart with --resume to update them')
+      return False
+    if os.path.exists(self.path):
+      os.remove(self.path)
+    return True
+
+  def close(self):
+    with self._lock:
+      if self._file is not None:
+        self._file.close()
+        self._file = None
@@ -0,0 +1,57 @@
+import os
+import sqlite3
+import threading
+from typing import Dict, List
+
+
+class Ledger:
+  """ Local record of the last content pushed to each wiki page: (lang_code, title) -> content SHA1 and wiki revid """
+  def __init__(self, logger, path: str):
+    self.logger = logger
+    self.path = path
+    self._lock = threading.Lock()
+    folder = os.path.dirname(path)
+    if folder:
+      os.makedirs(folder, exist_ok=True)
+    self.connection = sqlite3.connect(path, check_same_thread=False)
+    self.connection.execute(
+      'CREATE TABLE IF NOT EXISTS pages ('
+      'lang_code TEXT NOT NULL, title TEXT NOT NULL, content_sha1 TEXT NOT NULL, revid INTEGER, '
+      'PRIMARY KEY (lang_code, title))'
+    )
+
+  def get_many(self, lang_code: str, titles: List[str]) -> Dict[str, Dict]:
+    """ Get known pages of a language among titles
+      Returns:
+        dict title -> {'content_sha1': XX, 'revid': XX} (only for titles found in the ledger)
+    """
+    titles = list(titles)
+    rows = []
+    with self._lock:
+      for i in range(0, len(titles), 500):
+        batch = titles[i:i+500]
+        placeholders = ', '.join('?' * len(batch))
+        rows.extend(self.connection.execute(f'SELECT title, content_sha1, revid FROM pages WHERE lang_code = ? AND title IN ({placeholders})', (lang_code, *batch)).fetchall())
+    return {title: {'content_sha1': content_sha1, 'revid': revid} for title, content_sha1, revid in rows}
+
+  def set(self, lang_code: str, title: str, content_sha1: str, revid: int):
+    """ Store the content SHA1 and revid of a page in sync with the wiki """
+    self.set_many(lang_code, {title: {'content_sha1': content_sha1, 'revid': revid}})
+
+  def set_many(self, lang_code: str, entries: Dict[str, Dict]):
+    """ Store many pages at once (one transaction)
+      Args:
+        entries: dict title -> {'content_sha1': XX, 'revid': XX}
+    """
+    rows = [(lang_code, title, e.get('content_sha1'), e.get('revid')) for title, e in entries.items() if e.get('revid')]
+    if not rows:
+      return
+    try:
+      with self._lock, self.connection:
+        self.connection.executemany('INSERT OR REPLACE INTO pages (lang_code, title, content_sha1, revid) VALUES (?, ?, ?, ?)', rows)
+    except sqlite3.Error as e:
+      self.logger.warning(f'Error while saving {len(rows)} {lang_code} pages in ledger: {e}')
+
+  def close(self):
+    with self._lock:
+      self.connection.close()
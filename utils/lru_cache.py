@@ -0,0 +1,31 @@
+from collections import OrderedDict
+from typing import Any, Dict, Hashable
+
+
+class LRUCache:
+  """ Bounded cache dropping the least recently used entry when full, with hit / miss counters """
+  def __init__(self, maxsize: int = 4096):
+    self.maxsize = maxsize
+    self.entries = OrderedDict()
+    self.hits = 0
+    self.misses = 0
+
+  def get(self, key: Hashable) -> Any:
+    """ Cached value, None (and counted as a miss) if key isn't cached """
+    value = self.entries.get(key)
+    if value is None:
+      self.misses += 1
+      return None
+    self.hits += 1
+    self.entries.move_to_end(key)
+    return value
+
+  def put(self, key: Hashable, value: Any):
+    self.entries[key] = value
+    self.entries.move_to_end(key)
+    if len(self.entries) > self.maxsize:
+      self.entries.popitem(last=False)
+
+  def summary(self) -> Dict:
+    calls = self.hits + self.misses
+    return {'hits': self.hits, 'misses': self.misses, 'hit_rate': self.hits / calls if calls else 0, 'size': len(self.entries), 'maxsize': self.maxsize}
@@ -0,0 +1,117 @@
+import os
+import math
+import json
+import threading
+from datetime import datetime
+from collections import defaultdict
+from typing import Dict
+
+
+def _percentile(values: list, percent: float) -> float:
+  """ Nearest-rank percentile of a sorted list """
+  if not values:
+    return 0.0
+  rank = max(1, math.ceil(percent / 100 * len(values)))
+  return values[rank - 1]
+
+
+class RequestMetrics:
+  """ Records every wiki API call (latency, response size, status, retries) and time spent waiting for rate limiters,
+    tagged by API action (query, edit, upload, login...) and language. Safe to share between threads
+  """
+  def __init__(self):
+    self.calls = []
+    self.sleeps = defaultdict(float)
+    self._lock = threading.Lock()
+
+  def record(self, action: str, lang_code: str, latency: float, size: int, status, retries: int, retry_sleep: float, throttle_sleep: float, lane: str = 'request'):
+    """ Record one API call
+      Args:
+        latency: network time of all attempts, in seconds
+        size: response size in bytes (0 if no response)
+        status: HTTP status code of the last attempt, or error name
+        retries: number of retried attempts
+        retry_sleep: time slept between attempts
+        throttle_sleep: time slept in the rate limiter of the lane
+        lane: 'read' for queries, 'request' for writes
+    """
+    with self._lock:
+      self.calls.append({'action': action, 'lang_code': lang_code, 'latency': latency, 'size': size, 'status': status, 'retries': retries, 'retry_sleep': retry_sleep})
+      self.sleeps[(lane, lang_code)] += throttle_sleep
+
+  def record_sleep(self, lane: str, lang_code: str, seconds: float):
+    """ Record time slept in a rate limiter outside of an API call (ex: 'edit' lane before edits and uploads) """
+    with self._lock:
+      self.sleeps[(lane, lang_code)] += seconds
+
+  def summary(self, pages: int = None) -> Dict:
+    """ Aggregate records
+      Args:
+        pages: number of pages handled by the run, to compute requests per page
+      Returns:
+        dict with totals, and stats per action and per language
+    """
+    with self._lock:
+      calls = list(self.calls)
+      sleeps = dict(self.sleeps)
+
+    def stats(records: list) -> Dict:
+      latencies = sorted(r['latency'] for r in records)
+      return {
+        'requests': len(records),
+        'p50': _percentile(latencies, 50),
+        'p95': _percentile(latencies, 95),
+        'p99': _percentile(latencies, 99),
+        'network_time': sum(latencies),
+        'bytes': sum(r['size'] for r in records),
+        'retries': sum(r['retries'] for r in records),
+        'retry_sleep': sum(r['retry_sleep'] for r in records),
+        'errors': sum(1 for r in records if not isinstance(r['status'], int) or r['status'] >= 400)
+      }
+
+    by_action = defaultdict(list)
+    by_lang = defaultdict(list)
+    for call in calls:
+      by_action[call['action']].append(call)
+      by_lang[call['lang_code']].append(call)
+    total = stats(calls)
+    total['read_sleep'] = sum(s for (lane, _), s in sleeps.items() if lane == 'read')
+    total['request_sleep'] = sum(s for (lane, _), s in sleeps.items() if lane == 'request')
+    total['edit_sleep'] = sum(s for (lane, _), s in sleeps.items() if lane == 'edit')
+    total['pages'] = pages
+    total['requests_per_page'] = len(calls) / pages if pages else None
+    return {
+      'total': total,
+      'actions': {action: stats(records) for action, records in sorted(by_action.items())},
+      'languages': {lang: dict(stats(records), read_sleep=sleeps.get(('read', lang), 0.0), request_sleep=sleeps.get(('request', lang), 0.0), edit_sleep=sleeps.get(('edit', lang), 0.0)) for lang, records in sorted(by_lang.items())}
+    }
+
+  def log_summary(self, logger, pages: int = None) -> Dict:
+    """ Log a summary table of the run """
+    summary = self.summary(pages=pages)
+    total = summary['total']
+    if not total['requests']:
+      return summary
+    logger.info('Wiki requests summary:')
+    logger.info(f'  {'action':<10}{'requests':>9}{'p50':>8}{'p95':>8}{'p99':>8}{'network':>10}{'KB':>10}{'retries':>8}')
+    for name, s in list(summary['actions'].items()) + [('total', total)]:
+      logger.info(f'  {name:<10}{s['requests']:>9}{s['p50']:>7.2f}s{s['p95']:>7.2f}s{s['p99']:>7.2f}s{s['network_time']:>9.1f}s{s['bytes'] / 1024:>10.0f}{s['retries']:>8}')
+    logger.info(f'  time: {total['network_time']:.1f}s network, {total['read_sleep']:.1f}s read throttling, {total['request_sleep']:.1f}s request throttling, {total['edit_sleep']:.1f}s edit throttling, {total['retry_sleep']:.1f}s retry backoff')
+    if total['requests_per_page'] is not None:
+      logger.info(f'  {total['requests_per_page']:.2f} requests per page ({total['pages']} pages)')
+    return summary
+
+  def save(self, logger, folder: str = 'logs', pages: int = None) -> str|None:
+    """ Write the summary in a json file
+      Returns:
+        file path, None on error
+    """
+    path = os.path.join(folder, f'wiki_metrics_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json')
+    try:
+      os.makedirs(folder, exist_ok=True)
+      with open(path, 'w', encoding='utf-8') as f:
+        json.dump(self.summary(pages=pages), f, indent=2)
+    except OSError as e:
+      logger.warning(f'Error while saving wiki metrics: {e}')
+      return None
+    return path
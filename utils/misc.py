@@ -1,3 +1,6 @@
+import hashlib
+
+
 def group_data_by_hero(data):
   if not data:
     return
@@ -22,4 +25,8 @@ def group_data_by_hero(data):
   for group in groups:
     if len(group) < 5:
       group.append(['']*45)
-  return groups
\ No newline at end of file
+  return groups
+
+def content_sha1(content: str) -> str:
+  """ SHA1 of a page content, as computed by MediaWiki for revisions (trailing whitespace is trimmed on save) """
+  return hashlib.sha1(content.rstrip().encode('utf-8')).hexdigest()
\ No newline at end of file
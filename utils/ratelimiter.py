@@ -0,0 +1,75 @@
+import time
+import threading
+
+
+class RateLimiter:
+  """ Adaptive token bucket: allows `rate` calls per second with bursts of `burst` calls
+    - speeds up slowly (additive increase) while the server accepts our calls, up to max_rate
+    - slows down (halves the rate) and pauses only when the server tells us to (ratelimited, maxlag, Retry-After)
+  """
+  def __init__(self, rate: float, burst: int = 1, max_rate: float = None, min_rate: float = None, increase: float = None):
+    self.rate = rate
+    self.burst = burst
+    self.max_rate = max_rate or rate
+    self.min_rate = min_rate or rate / 10
+    self.increase = increase or self.max_rate / 20
+    self.tokens = burst
+    self.updated = time.monotonic()
+    self.blocked_until = 0
+    self.backoff = 5
+    self.max_backoff = 120
+    self._lock = threading.Lock()
+
+  def _refill(self, now: float):
+    self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+    self.updated = now
+
+  def acquire(self) -> float:
+    """ Wait for a token
+      Returns:
+        time slept in seconds
+    """
+    slept = 0
+    while True:
+      with self._lock:
+        now = time.monotonic()
+        self._refill(now)
+        if now < self.blocked_until:
+          wait = self.blocked_until - now
+        elif self.tokens >= 1:
+          self.tokens -= 1
+          return slept
+        else:
+          wait = (1 - self.tokens) / self.rate
+      time.sleep(wait)
+      slept += wait
+
+  def set_limit(self, hits: int, seconds: float):
+    """ Use server side limit (ex: ratelimits from meta=userinfo) as maximum rate """
+    with self._lock:
+      self.max_rate = hits / seconds
+      self.burst = max(1, min(self.burst, hits))
+      self.rate = min(self.rate, self.max_rate)
+      self.min_rate = min(self.min_rate, self.max_rate)
+      self.increase = self.max_rate / 20
+      self.tokens = min(self.tokens, self.burst)
+
+  def success(self):
+    """ Call accepted by the server: speed up a little """
+    with self._lock:
+      self.rate = min(self.max_rate, self.rate + self.increase)
+      self.backoff = 5
+
+  def penalize(self, retry_after: float = None) -> float:
+    """ Server asked us to slow down: halve the rate and pause for retry_after seconds (or an increasing backoff)
+      Returns:
+        pause duration in seconds
+    """
+    with self._lock:
+      self.rate = max(self.min_rate, self.rate / 2)
+      if retry_after is None:
+        retry_after = self.backoff
+        self.backoff = min(self.max_backoff, self.backoff * 2)
+      self.blocked_until = max(self.blocked_until, time.monotonic() + retry_after)
+      self.tokens = 0
+      return retry_after
@@ -0,0 +1,111 @@
+import time
+import random
+import threading
+from typing import Dict
+
+
+class CircuitBreaker:
+  """ Stop calling an endpoint after `threshold` consecutive failures, then let one call through every `cooldown` seconds """
+  def __init__(self, threshold: int = 10, cooldown: float = 60):
+    self.threshold = threshold
+    self.cooldown = cooldown
+    self.failures = 0
+    self.opened_at = None
+    self._lock = threading.Lock()
+
+  def allow(self) -> bool:
+    with self._lock:
+      if self.opened_at is None:
+        return True
+      if time.monotonic() - self.opened_at >= self.cooldown:
+        self.opened_at = time.monotonic()
+        return True
+      return False
+
+  def retry_in(self) -> float:
+    """ Seconds before a call is let through again (0 if the breaker is closed) """
+    with self._lock:
+      if self.opened_at is None:
+        return 0
+      return max(0, self.cooldown - (time.monotonic() - self.opened_at))
+
+  def record_success(self):
+    with self._lock:
+      self.failures = 0
+      self.opened_at = None
+
+  def record_failure(self) -> bool:
+    """ Returns:
+      True if the breaker just opened
+    """
+    with self._lock:
+      self.failures += 1
+      if self.failures >= self.threshold and self.opened_at is None:
+        self.opened_at = time.monotonic()
+        return True
+      return False
+
+
+class RetryPolicy:
+  """ Retry rules shared by all wiki sessions of a run:
+    - exponential backoff with jitter (or the server's Retry-After)
+    - max time spent on one request and max time spent waiting over the whole run
+    - waits asked by the server (429, maxlag, ratelimited) have their own cap and budget, so throttling doesn't use up the failure budget
+    - one circuit breaker per endpoint, opening only after more consecutive failures than one request may retry (breaker_threshold > max_retries)
+  """
+  def __init__(self, max_retries: int = 5, base_delay: float = 2, max_delay: float = 60, request_budget: float = 300, run_budget: float = 1800, max_throttled: int = 20, throttle_budget: float = 3600, breaker_threshold: int = 10, breaker_cooldown: float = 60):
+    self.max_retries = max_retries
+    self.base_delay = base_delay
+    self.max_delay = max_delay
+    self.request_budget = request_budget
+    self.run_budget = run_budget
+    self.max_throttled = max_throttled
+    self.throttle_budget = throttle_budget
+    self.breaker_threshold = breaker_threshold
+    self.breaker_cooldown = breaker_cooldown
+    self.breakers = {}
+    self.stats = {'retries': 0, 'wait_time': 0.0, 'given_up': 0, 'breaker_opened': 0, 'throttled': 0, 'throttle_time': 0.0}
+    self._lock = threading.Lock()
+
+  def breaker(self, endpoint: str) -> CircuitBreaker:
+    with self._lock:
+      if endpoint not in self.breakers:
+        self.breakers[endpoint] = CircuitBreaker(threshold=self.breaker_threshold, cooldown=self.breaker_cooldown)
+      return self.breakers[endpoint]
+
+  def next_delay(self, attempt: int, started: float, retry_after: float = None, throttled: bool = False) -> float|None:
+    """ Get the delay before next attempt
+      Args:
+        attempt: number of attempts already failed (starts at 1), or already throttled if throttled
+        started: time.monotonic() of the first attempt
+        retry_after: delay asked by the server, if any
+        throttled: the server asked to slow down, counted against max_throttled / throttle_budget instead of max_retries / run_budget
+      Returns:
+        delay in seconds, None if the request shouldn't be retried
+    """
+    if retry_after is not None:
+      delay = retry_after
+    else:
+      backoff = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+      delay = random.uniform(backoff / 2, backoff)
+    max_attempts, spent, budget = (self.max_throttled, 'throttle_time', self.throttle_budget) if throttled else (self.max_retries, 'wait_time', self.run_budget)
+    with self._lock:
+      out_of_budget = (
+        attempt > max_attempts
+        or time.monotonic() - started + delay > self.request_budget
+        or self.stats[spent] + delay > budget
+      )
+      if out_of_budget:
+        self.stats['given_up'] += 1
+        return None
+      self.stats['throttled' if throttled else 'retries'] += 1
+      self.stats[spent] += delay
+    return delay
+
+  def record_breaker_opened(self):
+    with self._lock:
+      self.stats['breaker_opened'] += 1
+
+  def summary(self) -> Dict:
+    with self._lock:
+      return dict(self.stats)
@@ -0,0 +1,72 @@
+import os
+import json
+import base64
+import threading
+from typing import Dict
+
+from cryptography.fernet import Fernet, InvalidToken
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+
+
+class SessionCache:
+  """ Encrypted local cache of logged-in wiki sessions (cookies + CSRF token), to skip the login handshake on next runs
+    Entries are encrypted with a key derived from `secret` (the bot password of the cached account, one cache per account): a new password makes the cache unreadable, so it is ignored
+  """
+  def __init__(self, logger, path: str, secret: str):
+    self.logger = logger
+    self.path = path
+    self.secret = secret or ''
+    self._fernets = {}
+    self._lock = threading.Lock()
+
+  def _fernet(self, salt: bytes) -> Fernet:
+    if salt not in self._fernets:
+      kdf = PBKDF2HMAC(algorithm=hashes.SHA256(), length=32, salt=salt, iterations=200000)
+      self._fernets[salt] = Fernet(base64.urlsafe_b64encode(kdf.derive(self.secret.encode('utf-8'))))
+    return self._fernets[salt]
+
+  def _read(self) -> Dict:
+    """ Decrypt all entries, empty dict if the cache doesn't exist or can't be read """
+    if not os.path.exists(self.path):
+      return {}
+    try:
+      with open(self.path, 'r', encoding='utf-8') as f:
+        stored = json.load(f)
+      salt = base64.b64decode(stored['salt'])
+      return json.loads(self._fernet(salt).decrypt(stored['data'].encode('ascii')))
+    except (OSError, ValueError, KeyError, InvalidToken) as e:
+      self.logger.warning(f'Wiki session cache {self.path} ignored: {type(e).__name__}')
+      return {}
+
+  def _write(self, entries: Dict):
+    salt = next(iter(self._fernets), None) or os.urandom(16)
+    data = self._fernet(salt).encrypt(json.dumps(entries).encode('utf-8'))
+    try:
+      folder = os.path.dirname(self.path)
+      if folder:
+        os.makedirs(folder, exist_ok=True)
+      file_descriptor = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+      with open(file_descriptor, 'w', encoding='utf-8') as f:
+        json.dump({'salt': base64.b64encode(salt).decode('ascii'), 'data': data.decode('ascii')}, f)
+    except OSError as e:
+      self.logger.warning(f'Error while saving wiki session cache: {e}')
+
+  def load(self, key: str) -> Dict|None:
+    """ Get a cached session
+      Returns:
+        {'cookies': [...], 'csrf_token': XX}, None if not cached
+    """
+    with self._lock:
+      return self._read().get(key)
+
+  def save(self, key: str, session: Dict|None):
+    """ Store a session (or remove it if session is None) """
+    with self._lock:
+      entries = self._read()
+      if session is None:
+        if entries.pop(key, None) is None:
+          return
+      else:
+        entries[key] = session
+      self._write(entries)
@@ -0,0 +1,90 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict
+
+from utils.wiki import Wiki
+from utils.drive import Drive
+
+
+class UploadQueue:
+  """ Upload many files to the wiki with a small pool of upload workers
+    - one download thread fetches Drive files in queue order (Drive client isn't thread safe) while earlier files are uploaded
+    - at most `prefetch` downloaded files wait for an upload worker
+    - each worker uploads on a session of its own (see Wiki.clone), all workers keep to the edit rate limiter of the wiki
+  """
+  def __init__(self, logger, wiki: Wiki, drive: Drive, workers: int = 3, prefetch: int = 4):
+    self.logger = logger
+    self.wiki = wiki
+    self.drive = drive
+    self.workers = max(1, workers)
+    self.prefetch = max(1, prefetch)
+    self.items = []
+    self.failed = []
+    self._lock = threading.Lock()
+    self._stop = threading.Event()
+
+  def add(self, wiki_filename: str, drive_file: Dict = None, filepath: str = None):
+    """ Queue a file to upload, either a Drive file (downloaded before upload) or a local file """
+    self.items.append({'wiki_filename': wiki_filename, 'drive_file': drive_file, 'filepath': filepath})
+
+  def _fail(self, wiki_filename: str):
+    with self._lock:
+      self.failed.append(wiki_filename)
+    self._stop.set()
+
+  def _download_all(self, ready: queue.Queue, workers: int):
+    """ Download thread: get local files in queue order, then signal the end to every worker """
+    try:
+      for item in self.items:
+        if self._stop.is_set():
+          break
+        filepath = item.get('filepath')
+        if item.get('drive_file'):
+          filepath = self.drive.download_file(item.get('drive_file'))
+          if not filepath:
+            self._fail(item.get('wiki_filename'))
+            break
+        ready.put((filepath, item.get('wiki_filename')))
+    finally:
+      for _ in range(workers):
+        ready.put(None)
+
+  def _upload_worker(self, wiki: Wiki, ready: queue.Queue):
+    while True:
+      item = ready.get()
+      if item is None:
+        return
+      if self._stop.is_set():
+        continue
+      filepath, wiki_filename = item
+      try:
+        uploaded = wiki.upload_file(filepath=filepath, wiki_filename=wiki_filename)
+      except Exception as e:
+        self.logger.error(f'Unexpected error while uploading {wiki_filename} : {e}')
+        uploaded = False
+      if not uploaded:
+        self._fail(wiki_filename)
+
+  def run(self) -> bool:
+    """ Download and upload all queued files, stops queueing new files after the first failure
+      Returns:
+        True if all files were uploaded
+    """
+    if not self.items:
+      return True
+    workers = min(self.workers, len(self.items))
+    self.logger.info(f'Uploading {len(self.items)} files with {workers} workers')
+    wikis = [self.wiki] + [self.wiki.clone() for _ in range(workers - 1)]
+    ready = queue.Queue(maxsize=self.prefetch)
+    downloader = threading.Thread(target=self._download_all, args=(ready, workers), name='upload-download', daemon=True)
+    downloader.start()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='upload') as executor:
+      for future in [executor.submit(self._upload_worker, wiki, ready) for wiki in wikis]:
+        future.result()
+    downloader.join()
+    self.items = []
+    if self.failed:
+      self.logger.error(f'Failed to upload {', '.join(self.failed)}')
+      return False
+    return True
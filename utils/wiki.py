@@ -1,42 +1,100 @@
 from requests import Session
 from requests.exceptions import RequestException, Timeout, ConnectionError
-from datetime import datetime
+from datetime import datetime, timezone
 import time
-import random
 import os
+import io
+import json
 import hashlib
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.ratelimiter import RateLimiter
+from utils.retry import RetryPolicy
+from utils.metrics import RequestMetrics
+from utils.wikitext import plan_section_edit
+from utils.session_cache import SessionCache
+
+_upload_state_lock = threading.Lock()
 
 class Wiki:
 
-  def __init__(self, config, logger, lang_code='en', timeout=20):
+  def __init__(self, config, logger, lang_code='en', timeout=20, request_limiter=None, edit_limiter=None, retry_policy=None, metrics=None, session_cache: SessionCache = None, read_limiter=None, read_concurrency=4, username=None, password=None):
     self.session = Session()
+    self.config = config
     self.base_url = config.WIKI_URL
-    self.username = config.WIKI_USERNAME
-    self.password = config.WIKI_PWD
+    self.username = username or config.WIKI_USERNAME
+    self.password = password or config.WIKI_PWD
     self.lang_code = lang_code
     self.timeout = timeout
-    self.max_timeouts = 10
     self.logger = logger
     self.login_token = None
     self.csrf_token = None
 
-    self.last_edit_time = 0
     self.consecutive_edits = 0
-    self.base_delay = 0.5
-    self.batch_pause_threshold = 10
-    self.batch_pause_duration = 10
     self.batch_size = 50
+    self.images_index = None
+    self.chunk_size = 4 * 1024 * 1024
+    self.upload_state_file = os.path.join('cache', 'uploads.json')
+    self.maxlag = 5
+    # read lane (GET queries): light limiter, several queries at once
+    self.read_limiter = read_limiter or RateLimiter(rate=10, burst=20, max_rate=50)
+    self.read_concurrency = max(1, read_concurrency)
+    # write lane (login, edits, uploads): conservative limiters
+    self.request_limiter = request_limiter or RateLimiter(rate=2, burst=5, max_rate=10)
+    self.edit_limiter = edit_limiter or RateLimiter(rate=0.5, burst=3, max_rate=1)
+    # a requests session is used by one thread at a time: requests sent on self.session are serialized by _session_lock,
+    # page and file reads are sent on read sessions of their own (see _read_request), logged in with a copy of self.session cookies
+    self._session_lock = threading.Lock()
+    self._read_sessions = queue.Queue()
+    self.retry_policy = retry_policy or RetryPolicy()
+    self.metrics = metrics or RequestMetrics()
+    self.session_cache = session_cache
 
   def initialize(self) -> bool:
-    """ Initialise wiki connexion """
+    """ Initialise wiki connexion, reusing the cached session of a previous run if it is still logged in """
+    if self._restore_session():
+      return True
     if not self.get_login_token():
       return False
     if not self.login_request():
       return False
     if not self.get_csrf_token():
       return False
+    self._load_user_limits()
+    self._save_session()
     return True
 
+  def _session_key(self) -> str:
+    return f'{self.base_url}|{self.username}|{self.lang_code}'
+
+  def _restore_session(self) -> bool:
+    """ Load cookies and CSRF token from session cache and check they are still valid (one userinfo query with assert=user) """
+    if not self.session_cache:
+      return False
+    cached = self.session_cache.load(self._session_key())
+    if not cached:
+      return False
+    for cookie in cached.get('cookies', []):
+      self.session.cookies.set(cookie['name'], cookie['value'], domain=cookie.get('domain'), path=cookie.get('path'), expires=cookie.get('expires'), secure=cookie.get('secure', False))
+    self.csrf_token = cached.get('csrf_token')
+    if self._load_user_limits(assert_user=True):
+      self.logger.info(f'Cached {self.lang_code} wiki session still valid, login skipped')
+      return True
+    self.logger.info(f'Cached {self.lang_code} wiki session expired, login needed')
+    self.session.cookies.clear()
+    self.csrf_token = None
+    self.session_cache.save(self._session_key(), None)
+    return False
+
+  def _save_session(self):
+    """ Store cookies and CSRF token in session cache """
+    if not self.session_cache:
+      return
+    cookies = [{'name': c.name, 'value': c.value, 'domain': c.domain, 'path': c.path, 'expires': c.expires, 'secure': c.secure} for c in self.session.cookies]
+    self.session_cache.save(self._session_key(), {'cookies': cookies, 'csrf_token': self.csrf_token})
+
 
   def _get_api_endpoint(self):
     """ Get the correct API endpoint for the current language """
@@ -46,70 +104,164 @@ class Wiki:
         return f'{self.base_url}{self.lang_code}/api.php'
 
 
-  def _make_request(self, method, params=None, data=None, file=None, _retries=3):
-    """ Util func to make requests """
+  def _new_session(self) -> Session:
+    """ New requests session logged in as self.session (copy of its cookies) """
+    session = Session()
+    with self._session_lock:
+      session.cookies.update(self.session.cookies)
+    return session
+
+  def clone(self):
+    """ Same logged-in wiki on a session of its own (copy of the cookies and CSRF token), to send requests from another thread at the same time
+      rate limiters, retry policy, metrics and files index are shared with this wiki
+    """
+    wiki = Wiki(config=self.config, logger=self.logger, lang_code=self.lang_code, timeout=self.timeout, request_limiter=self.request_limiter, edit_limiter=self.edit_limiter, retry_policy=self.retry_policy, metrics=self.metrics, read_limiter=self.read_limiter, read_concurrency=self.read_concurrency, username=self.username, password=self.password)
+    wiki.session = self._new_session()
+    wiki.csrf_token = self.csrf_token
+    wiki.batch_size = self.batch_size
+    wiki.images_index = self.images_index
+    return wiki
+
+  def _send_request(self, session, method, endpoint, params, data, file):
+    """ Send one request (no retry) """
+    if method.upper() == 'GET':
+      params['uselang'] = self.lang_code
+      params['maxlag'] = self.maxlag
+      return session.get(
+        url=endpoint, 
+        params=params,
+        timeout=self.timeout
+      )
+    elif method.upper() == 'POST':
+      data['uselang'] = self.lang_code
+      data['maxlag'] = self.maxlag
+      return session.post(
+        url=endpoint, 
+        data=data, 
+        timeout=self.timeout
+      )
+    elif method.upper() == 'POST UPLOAD':
+      data['maxlag'] = self.maxlag
+      for _, file_stream, *_ in file.values():
+        file_stream.seek(0)
+      return session.post(
+        url=endpoint,
+        data=data,
+        files=file,
+        timeout=self.timeout
+      )
+
+
+  def _make_request(self, method, params=None, data=None, file=None, session=None):
+    """ Util func to make requests, with retries following self.retry_policy on server errors, timeouts and slow down requests
+      session: requests session owned by the calling thread, self.session (one request at a time) if None
+    """
     if params is None:
       params = {}
     if data is None:
       data = {}
-        
-    self._apply_request_delay()
+    if method.upper() not in ('GET', 'POST', 'POST UPLOAD'):
+      self.logger.error(f'Unsupported request method : {method}')
+      return None
+    if method.upper() == 'POST UPLOAD' and not file:
+      self.logger.error(f'Upload error : file is empty')
+      return 'retry'
+
     endpoint = self._get_api_endpoint()
+    breaker = self.retry_policy.breaker(endpoint)
+    limiter, lane = (self.read_limiter, 'read') if method.upper() == 'GET' else (self.request_limiter, 'request')
+    started = time.monotonic()
+    attempt = 0
+    failures = 0
+    throttles = 0
+    call = {'action': params.get('action') or data.get('action') or 'query', 'latency': 0.0, 'size': 0, 'status': None, 'retry_sleep': 0.0, 'throttle_sleep': 0.0}
     try:
-      if method.upper() == 'GET':
-        params['uselang'] = self.lang_code
-        response = self.session.get(
-          url=endpoint, 
-          params=params,
-          timeout=self.timeout
-        )
-      elif method.upper() == 'POST':
-        data['uselang'] = self.lang_code
-        response = self.session.post(
-          url=endpoint, 
-          data=data, 
-          timeout=self.timeout
-        )
-      elif method.upper() == 'POST UPLOAD':
-        if file:
-          response = self.session.post(
-            url=endpoint,
-            data=data,
-            files=file,
-            timeout=self.timeout
-          )
-        else:
-          self.logger.error(f'Upload error : file is empty')
-          return 'retry'
-      else:
-        self.logger.error(f'Unsupported request method : {method}')
-        return None
-      if response.status_code >= 500:
-        if _retries > 0:
-          wait = random.uniform(5, 15)
-          self.logger.warning(f'Server error {response.status_code}, retrying in {wait:.1f}s ({_retries} left)')
+      while True:
+        if not breaker.allow():
+          wait = max(1, breaker.retry_in())
+          if time.monotonic() - started + wait > self.retry_policy.request_budget:
+            self.logger.error(f'Too many failures on {endpoint}: requests paused, giving up')
+            call['status'] = 'breaker_open'
+            return None
+          self.logger.warning(f'Too many failures on {endpoint}: requests paused, waiting {wait:.0f}s')
           time.sleep(wait)
-          return self._make_request(method=method, params=params, data=data, file=file, _retries=_retries-1)
+          call['retry_sleep'] += wait
+          continue
+        call['throttle_sleep'] += self._apply_request_delay(limiter)
+        attempt += 1
+        retry_after = None
+        failure = True
+        sent = time.monotonic()
+        try:
+          if session is not None:
+            response = self._send_request(session, method, endpoint, params, data, file)
+          else:
+            with self._session_lock:
+              response = self._send_request(self.session, method, endpoint, params, data, file)
+          call['latency'] += time.monotonic() - sent
+          call['status'] = response.status_code
+          call['size'] = len(response.content)
+          if response.status_code >= 500:
+            reason = f'Server error {response.status_code}'
+            retry_after = self._get_retry_after(response)
+          elif response.status_code == 429 or self._is_maxlag_error(response):
+            reason = f'Server asked to slow down ({response.status_code})'
+            failure = False
+            retry_after = limiter.penalize(self._get_retry_after(response))
+          else:
+            response.raise_for_status()
+            limiter.success()
+            breaker.record_success()
+            return response
+        except Timeout:
+          call['latency'] += time.monotonic() - sent
+          call['status'] = 'timeout'
+          reason = 'Timeout while requesting wiki'
+        except ConnectionError:
+          call['latency'] += time.monotonic() - sent
+          call['status'] = 'connection_error'
+          reason = 'Unable to connect to wiki'
+        except RequestException as e:
+          call['latency'] += time.monotonic() - sent
+          call['status'] = 'request_error'
+          self.logger.error(f'Request error : {e}')
+          return None
+
+        if failure:
+          failures += 1
+          if breaker.record_failure():
+            self.retry_policy.record_breaker_opened()
         else:
-          self.logger.error(f'Server error {response.status_code} after all retries')
+          throttles += 1
+        delay = self.retry_policy.next_delay(attempt=failures if failure else throttles, started=started, retry_after=retry_after, throttled=not failure)
+        if delay is None:
+          self.logger.error(f'{reason} : giving up after {attempt} attempts')
           return None
-      response.raise_for_status()
-      return response
-    
-    except Timeout:
-      self.logger.error(f'Timeout while requesting wiki : {self.max_timeouts} timeouts left')
-      self.max_timeouts -= 1
-      if self.max_timeouts == 0:
-        return None
-      return self._make_request(method=method, params=params, data=data, file=file)
-    except ConnectionError:
-      self.logger.error('Unable to connect to wiki')
-      return None
-    except RequestException as e:
-      self.logger.error(f'Request error : {e}')
+        self.logger.warning(f'{reason}, retrying in {delay:.1f}s (attempt {attempt})')
+        time.sleep(delay)
+        call['retry_sleep'] += delay
+    finally:
+      self.metrics.record(action=call['action'], lang_code=self.lang_code, latency=call['latency'], size=call['size'], status=call['status'], retries=max(0, attempt - 1), retry_sleep=call['retry_sleep'], throttle_sleep=call['throttle_sleep'], lane=lane)
+
+
+  def _get_retry_after(self, response) -> float|None:
+    """ Read Retry-After header (in seconds) if the server sent one """
+    try:
+      return float(response.headers.get('Retry-After'))
+    except (TypeError, ValueError):
       return None
 
 
+  def _is_maxlag_error(self, response) -> bool:
+    """ Replication lag is higher than our maxlag parameter: the server sends Retry-After and a 'maxlag' error """
+    if 'Retry-After' not in response.headers:
+      return False
+    try:
+      return response.json().get('error', {}).get('code') == 'maxlag'
+    except ValueError:
+      return False
+
+
   def _extract_values(self, data, *keys):
     """ Util to extract nested values """
     try:
@@ -222,31 +374,66 @@ class Wiki:
       self.logger.error(f'Invalid JSON response while getting CSRF token: {e}')
       return False
 
-  def _apply_request_delay(self):
-    """ Apply delay between requests """
-    current_time = time.time()
-    if self.last_edit_time == 0:
-      self.last_edit_time = current_time
-      return
-    elapsed = current_time - self.last_edit_time
-    
-    if elapsed < self.base_delay:
-        delay = self.base_delay - elapsed + random.uniform(0.5, 1.5)
-        self.logger.debug(f'Applying delay: {delay:.1f}s')
-        time.sleep(delay)
-    
-    self.last_edit_time = time.time()
+  def _load_user_limits(self, assert_user=False) -> bool:
+    """ Adapt to bot account rights and limits:
+      - use API high limits (500 titles per query instead of 50) if allowed
+      - use edit rate limits as maximum edit rate
+      Args:
+        assert_user: fail if the session is not logged in
+      Returns:
+        False if user info couldn't be read (or session is not logged in with assert_user)
+    """
+    params = {
+      'action': 'query',
+      'meta': 'userinfo',
+      'uiprop': 'rights|ratelimits',
+      'format': 'json'
+    }
+    if assert_user:
+      params['assert'] = 'user'
+    try:
+      response = self._make_request('GET', params=params)
+      if not response:
+        return False
+      data = response.json()
+      if 'error' in data:
+        if not assert_user:
+          self.logger.warning(f'API error while getting user rights: {data['error']}')
+        return False
+      userinfo = data.get('query', {}).get('userinfo', {})
+    except ValueError as e:
+      self.logger.warning(f'Invalid JSON response while getting user rights: {e}')
+      return False
+    if 'apihighlimits' in userinfo.get('rights', []):
+      self.batch_size = 500
+    self.logger.debug(f'Query batch size: {self.batch_size} titles')
+    edit_limits = userinfo.get('ratelimits', {}).get('edit', {}).values()
+    if edit_limits:
+      limit = min(edit_limits, key=lambda l: l.get('hits', 0) / l.get('seconds', 1))
+      self.edit_limiter.set_limit(hits=limit.get('hits'), seconds=limit.get('seconds'))
+      self.logger.info(f'Edit rate limit: {limit.get('hits')} edits per {limit.get('seconds')}s')
+    return True
 
-  def _apply_edit_delay(self):
-    """ Apply extra delay between edits and batch pause logic """
-    extra_delay = random.uniform(1, 3)
-    self.logger.debug(f'Extra edit delay: {extra_delay:.1f}s')
-    time.sleep(extra_delay)
-    
-    if self.consecutive_edits > 0 and self.consecutive_edits % self.batch_pause_threshold == 0:
-        pause = self.batch_pause_duration + random.uniform(-2, 5)
-        self.logger.info(f'Batch pause after {self.consecutive_edits} edits: {pause:.1f}s')
-        time.sleep(pause)
+  def _apply_request_delay(self, limiter: RateLimiter = None) -> float:
+    """ Wait for the request rate limiter (or the given lane limiter)
+      Returns:
+        time slept in seconds
+    """
+    slept = (limiter or self.request_limiter).acquire()
+    if slept:
+      self.logger.debug(f'Request delay: {slept:.1f}s')
+    return slept
+
+  def _apply_edit_delay(self) -> float:
+    """ Wait for the edit rate limiter
+      Returns:
+        time slept in seconds
+    """
+    slept = self.edit_limiter.acquire()
+    if slept:
+      self.logger.debug(f'Edit delay: {slept:.1f}s')
+    self.metrics.record_sleep('edit', self.lang_code, slept)
+    return slept
 
   def _build_page_title(self, title):
     return title.strip().replace(' ', '_')
@@ -260,8 +447,12 @@ class Wiki:
       return f'{self.base_url}{self.lang_code}/wiki/{clean_title}'
   
 
-  def edit_request(self, title, content, summary=None, minor=False):
-    """ Edit a wiki page """
+  def edit_request(self, title, content, summary=None, minor=False, section=None):
+    """ Edit a wiki page (or only one of its sections if section is set)
+      Returns:
+      - edit result dict on success (with 'newrevid', or 'nochange' if content was the same)
+      - False otherwise
+    """
     if not self.csrf_token:
       self.logger.error('Missing CSRF token - unable to edit')
       return False
@@ -270,7 +461,6 @@ class Wiki:
       self.logger.error('Page title cannot be empty')
       return False
     
-    self._apply_edit_delay()
     clean_title = self._build_page_title(title)
     data = {
       'action': 'edit',
@@ -279,28 +469,36 @@ class Wiki:
       'token': self.csrf_token,
       'format': 'json'
     }
+    if section is not None:
+      data['section'] = section
+      data['nocreate'] = '1'
     if summary:
       data['summary'] = f'[{self.lang_code}] {summary}'
     else:
       data['summary'] = f'[{self.lang_code}] Update from {datetime.today().strftime('%Y-%m-%d')}'
+    started = time.monotonic()
+    attempt = 0
     try:
-      response = self._make_request('POST', data=data)
-      if not response:
-        return False
-      data = response.json()
-      if 'error' in data:
-        error_info = data['error']
+      while True:
+        self._apply_edit_delay()
+        attempt += 1
+        response = self._make_request('POST', data=data)
+        if not response:
+          return False
+        result = response.json()
+        if 'error' not in result:
+          break
+        error_info = result['error']
         error_code = error_info.get('code', 'unknown')
         error_message = error_info.get('info', 'unknown error')
 
         if error_code == 'badtoken':
           self.logger.error('Invalid CSRF token - need to reconnect')
           if self.get_csrf_token():
-            return self.edit_request(title, content, summary, minor)
+            return self.edit_request(title, content, summary, minor, section)
         elif error_code == 'ratelimited':
-          self.logger.warning('Rate limited - waiting 60s before retry')
-          time.sleep(60)
-          return self.edit_request(title, content, summary, minor)
+          if self._retry_ratelimited(response, attempt, started):
+            continue
         elif error_code == 'protectedpage':
           self.logger.error(f'Protected page: {error_message}')
         elif error_code == 'permissiondenied':
@@ -309,12 +507,12 @@ class Wiki:
           self.logger.error(f'Edit error ({error_code}): {error_message}')
         return False
       
-      edit_result = data.get('edit', {})
+      edit_result = result.get('edit', {})
       if edit_result.get('result') == 'Success':
         self.consecutive_edits += 1
-        self.last_edit_time = time.time()
+        self.edit_limiter.success()
         self.logger.info(f'Page {title} edited (#{self.consecutive_edits})')
-        return True
+        return edit_result
       else:
         self.logger.error(f'Edit failed: {edit_result}')
         return False
@@ -322,8 +520,35 @@ class Wiki:
     except ValueError as e:
       self.logger.error(f'Invalid JSON response while editing: {e}')
       return False
+
+  def _retry_ratelimited(self, response, attempt: int, started: float) -> bool:
+    """ Slow down edits after a 'ratelimited' error, the next edit waits for the pause asked by the server
+      Args:
+        attempt: number of 'ratelimited' errors already received for this request (starts at 1)
+        started: time.monotonic() of the first attempt
+      Returns:
+        True if the request can be sent again, False if out of retry policy limits
+    """
+    pause = self.edit_limiter.penalize(self._get_retry_after(response))
+    if self.retry_policy.next_delay(attempt=attempt, started=started, retry_after=pause, throttled=True) is None:
+      self.logger.error(f'Rate limited : giving up after {attempt} attempts')
+      return False
+    self.logger.warning(f'Rate limited - slowing down to {self.edit_limiter.rate * 60:.1f} edits/min, retrying in {pause:.0f}s')
+    return True
     
 
+  def edit_page(self, title, content, current_content=None, summary=None, minor=False):
+    """ Edit a wiki page, sending only the changed section when current_content is known and only one section changed
+      Returns:
+        same as edit_request
+    """
+    plan = plan_section_edit(current_content, content) if current_content else None
+    if plan is None:
+      return self.edit_request(title, content, summary, minor)
+    section, section_content = plan
+    self.logger.info(f'Page {title}: only section {section} changed, sending {len(section_content)} of {len(content)} chars')
+    return self.edit_request(title, section_content, summary, minor, section=section)
+
   def get_page_content(self, title):
     """ Get the content of a wiki page
       Returns:
@@ -345,7 +570,7 @@ class Wiki:
       'format': 'json'
     }
     try:
-      response = self._make_request('GET', params=params)
+      response = self._read_request(params)
       if not response:
         return False
       
@@ -371,6 +596,108 @@ class Wiki:
       self.logger.error(f'Invalid JSON response while getting page content: {e}')
       return False
     
+  def _query_revisions(self, titles: list[str], rvprop: str) -> dict|None:
+    """ Get the last revision of many pages, batch_size titles per query, following 'continue'
+      Up to read_concurrency queries are sent at once, each one on a read session of its own (see _read_request)
+      Args:
+        titles: page titles (as generated)
+        rvprop: revision properties to get (ex: 'content', 'sha1|ids')
+      Returns:
+        dict title -> revision dict (None if page doesn't exist), None if there was an error
+    """
+    batches = [titles[i:i+self.batch_size] for i in range(0, len(titles), self.batch_size)]
+    if len(batches) > 1 and self.read_concurrency > 1:
+      with ThreadPoolExecutor(max_workers=min(self.read_concurrency, len(batches)), thread_name_prefix=f'read-{self.lang_code}') as executor:
+        batch_results = list(executor.map(lambda batch: self._query_revisions_batch(batch, rvprop), batches))
+    else:
+      batch_results = [self._query_revisions_batch(batch, rvprop) for batch in batches]
+    result = {}
+    for batch_result in batch_results:
+      if batch_result is None:
+        return None
+      result.update(batch_result)
+    return result
+
+  def _read_request(self, params):
+    """ GET request sent on an idle read session (a new one if all are busy), given back once the request is done:
+      reads from several threads run at the same time, without waiting for requests sent on self.session
+    """
+    try:
+      session = self._read_sessions.get_nowait()
+    except queue.Empty:
+      session = self._new_session()
+    try:
+      return self._make_request('GET', params=params, session=session)
+    finally:
+      self._read_sessions.put(session)
+
+  def _query_revisions_batch(self, titles: list[str], rvprop: str) -> dict|None:
+    """ Get the last revision of up to batch_size pages (one query, plus its continuations), see _query_revisions """
+    result = {}
+    # several requested titles may be the same wiki page ('_' / space, first letter case): each one gets the result of the page
+    batch = {}
+    for title in titles:
+      batch.setdefault(self._build_page_title(title), []).append(title)
+    params = {
+      'action': 'query',
+      'titles': '|'.join(batch.keys()),
+      'prop': 'revisions',
+      'rvprop': rvprop,
+      'format': 'json'
+    }
+    if 'content' in rvprop:
+      params['rvslots'] = 'main'
+    while True:
+      try:
+        response = self._read_request(params)
+        if not response:
+          return None
+        data = response.json()
+      except ValueError as e:
+        self.logger.error(f'Invalid JSON response while getting revisions: {e}')
+        return None
+      if 'error' in data:
+        self.logger.error(f'API error while getting revisions: {data.get('error')}')
+        return None
+
+      query = data.get('query', {})
+      normalized = {n.get('from'): n.get('to') for n in query.get('normalized', [])}
+      requested = {}
+      for sent, sent_titles in batch.items():
+        requested.setdefault(normalized.get(sent, sent), []).extend(sent_titles)
+      for page_data in query.get('pages', {}).values():
+        for title in requested.get(page_data.get('title'), []):
+          if 'missing' in page_data or 'invalid' in page_data:
+            result[title] = None
+          elif page_data.get('revisions'):
+            result[title] = page_data['revisions'][0]
+          else:
+            result.setdefault(title, {})
+
+      if 'continue' in data:
+        params.update(data['continue'])
+      else:
+        break
+    return result
+
+  def get_pages_content(self, titles: list[str]) -> dict|None:
+    """ Get the content of many wiki pages at once
+      Returns:
+      - dict title -> content (None if page doesn't exist, '' if no revision found)
+      - None if there was an error
+    """
+    revisions = self._query_revisions(titles, rvprop='content')
+    if revisions is None:
+      return None
+    contents = {}
+    for title in titles:
+      revision = revisions.get(title)
+      if revision is None:
+        contents[title] = None
+      else:
+        contents[title] = revision.get('slots', {}).get('main', {}).get('*', '')
+    return contents
+
   def page_exists(self, title) -> bool:
     """ Check if page exists """
     if not title or not title.strip():
@@ -400,33 +727,6 @@ class Wiki:
       return False
 
 
-  def switch_language(self, new_lang_code):
-    """ Changes self.lang_code and reinitializes session for the new language """
-    if new_lang_code == self.lang_code:
-      return True
-    
-    self.logger.info(f'Switching language to {new_lang_code}')
-    self.lang_code = new_lang_code
-
-    self.session = Session()
-    self.login_token = None
-    self.csrf_token = None
-
-    if not self.get_login_token():
-      self.logger.error(f'Failed to get login token after switching to {new_lang_code}')
-      return False
-
-    if not self.login_request():
-      self.logger.error(f'Failed to log in after switching to {new_lang_code}')
-      return False
-
-    if not self.get_csrf_token():
-      self.logger.error(f'Failed to get new CSRF token after switching to {new_lang_code}')
-      return False
-
-    return True
-  
-
   def file_exists_in_shared_repo(self, filename: str) -> bool:
     """Check if the file exists in the shared Fandom repository (Commons)"""
     params = {
@@ -438,7 +738,8 @@ class Wiki:
     }
 
     try:
-      response = self.session.get(self._get_api_endpoint(), params=params)
+      with self._session_lock:
+        response = self.session.get(self._get_api_endpoint(), params=params)
       response.raise_for_status()
       data = response.json()
 
@@ -454,8 +755,129 @@ class Wiki:
       return False
 
 
+  def _file_sha1(self, filepath) -> str:
+    """ SHA1 of a local file, read block by block """
+    sha1 = hashlib.sha1()
+    with open(filepath, 'rb') as f:
+      for block in iter(lambda: f.read(1048576), b''):
+        sha1.update(block)
+    return sha1.hexdigest()
+
+  def _load_upload_state(self, wiki_filename: str) -> dict|None:
+    """ Get saved state of an interrupted chunked upload: {'sha1': XX, 'filekey': XX, 'offset': XX} """
+    with _upload_state_lock:
+      try:
+        with open(self.upload_state_file, 'r', encoding='utf-8') as f:
+          return json.load(f).get(f'{self.lang_code}:{wiki_filename}')
+      except (OSError, ValueError):
+        return None
+
+  def _save_upload_state(self, wiki_filename: str, state: dict|None):
+    """ Save (or remove if state is None) the state of a chunked upload """
+    with _upload_state_lock:
+      try:
+        with open(self.upload_state_file, 'r', encoding='utf-8') as f:
+          states = json.load(f)
+      except (OSError, ValueError):
+        states = {}
+      key = f'{self.lang_code}:{wiki_filename}'
+      if state is None:
+        states.pop(key, None)
+      else:
+        states[key] = state
+      try:
+        os.makedirs(os.path.dirname(self.upload_state_file), exist_ok=True)
+        with open(self.upload_state_file, 'w', encoding='utf-8') as f:
+          json.dump(states, f)
+      except OSError as e:
+        self.logger.warning(f'Error while saving upload state: {e}')
+
+  def _post_upload(self, data, file=None):
+    """ Send an upload request, refreshing CSRF token once if needed
+      A 'ratelimited' request is sent again (only this one) within self.retry_policy limits
+      Returns:
+        (response, result json) or (None, None) on request error
+    """
+    method = 'POST UPLOAD' if file else 'POST'
+    started = time.monotonic()
+    attempt = 0
+    while True:
+      attempt += 1
+      response = self._make_request(method, data=data, file=file)
+      if not response:
+        return None, None
+      elif response == 'retry':
+        response = self._make_request(method, data=data, file=file)
+        if not response or response == 'retry':
+          return None, None
+      result = response.json()
+      if result.get('error', {}).get('code') == 'badtoken':
+        self.logger.warning('Invalid CSRF token - refreshing token before retrying upload')
+        if self.get_csrf_token():
+          data['token'] = self.csrf_token
+          response = self._make_request(method, data=data, file=file)
+          if not response:
+            return None, None
+          result = response.json()
+      if result.get('error', {}).get('code') != 'ratelimited' or not self._retry_ratelimited(response, attempt, started):
+        return response, result
+      self._apply_edit_delay()
+
+  def _upload_file_chunks(self, filepath, wiki_filename: str, local_sha1: str, data: dict):
+    """ Upload a big file chunk by chunk in the upload stash, then publish it from the stash
+      Each request takes the current CSRF token, so a token refreshed by one chunk is used by the next ones
+      An interrupted upload of the same file (same SHA1) resumes from its last uploaded chunk, or is only published if all chunks were stashed
+      Returns:
+        (response, result json) of the last request or (None, None) on request error
+    """
+    filesize = os.path.getsize(filepath)
+    offset = 0
+    filekey = None
+    state = self._load_upload_state(wiki_filename)
+    if state and state.get('sha1') == local_sha1:
+      offset = state.get('offset', 0)
+      filekey = state.get('filekey')
+      self.logger.info(f'Resuming upload of {wiki_filename} at {offset}/{filesize} bytes')
+
+    with open(filepath, 'rb') as file_stream:
+      while offset < filesize:
+        file_stream.seek(offset)
+        chunk = io.BytesIO(file_stream.read(self.chunk_size))
+        chunk_data = dict(data, token=self.csrf_token, stash='1', filesize=filesize, offset=offset)
+        if filekey:
+          chunk_data['filekey'] = filekey
+        response, result = self._post_upload(chunk_data, file={'chunk': (wiki_filename, chunk, 'application/octet-stream')})
+        if result is None:
+          return None, None
+        if 'error' in result:
+          if filekey and result['error'].get('code', '').startswith('stash'):
+            self.logger.warning(f'Stashed upload of {wiki_filename} expired, restarting from first chunk')
+            self._save_upload_state(wiki_filename, None)
+            offset = 0
+            filekey = None
+            continue
+          return response, result
+        upload = result.get('upload', {})
+        filekey = upload.get('filekey', filekey)
+        if upload.get('result') == 'Continue':
+          offset = upload.get('offset', offset + self.chunk_size)
+          self._save_upload_state(wiki_filename, {'sha1': local_sha1, 'filekey': filekey, 'offset': offset})
+          self.logger.debug(f'Upload {wiki_filename}: {offset}/{filesize} bytes')
+        elif upload.get('result') == 'Success':
+          self._save_upload_state(wiki_filename, {'sha1': local_sha1, 'filekey': filekey, 'offset': filesize})
+          break
+        else:
+          return response, result
+
+    commit_data = dict(data, token=self.csrf_token, filekey=filekey)
+    response, result = self._post_upload(commit_data)
+    if result is not None and (result.get('upload', {}).get('result') == 'Success' or result.get('error', {}).get('code', '').startswith('stash')):
+      self._save_upload_state(wiki_filename, None)
+    return response, result
+
   def upload_file(self, filepath, wiki_filename: str, ignore_warnings=True) -> bool:
     """ Upload a file to the wiki and delete local copy after upload
+      Files bigger than self.chunk_size are sent chunk by chunk
       Args:
         filepath: local path to the file (in /temp)
         wiki_filename: file name as it appears on the wiki
@@ -466,7 +888,7 @@ class Wiki:
     if not os.path.isfile(filepath):
       self.logger.error(f'File not found: {filepath}')
       return False
-    local_sha1 = hashlib.sha1(open(filepath, 'rb').read()).hexdigest()
+    local_sha1 = self._file_sha1(filepath)
     remote_sha1 = self.get_file_sha1(wiki_filename)
     if remote_sha1 and remote_sha1 == local_sha1:
       self.logger.info(f'Skipping upload for {wiki_filename}: identical SHA1')
@@ -474,38 +896,39 @@ class Wiki:
       return True
     self._apply_edit_delay()
     result_ok = False
-    code = None
+    filesize = os.path.getsize(filepath)
+    data = {
+      'action': 'upload',
+      'filename': wiki_filename,
+      'token': self.csrf_token,
+      'format': 'json',
+      'ignorewarnings': '1' if ignore_warnings else '0'
+    }
     try:
-      with open(filepath, 'rb') as file_stream:
-        file = {'file': (wiki_filename, file_stream, 'image/png')}
-        data = {
-          'action': 'upload',
-          'filename': wiki_filename,
-          'token': self.csrf_token,
-          'format': 'json',
-          'ignorewarnings': '1' if ignore_warnings else '0'
-        }
-        response = self._make_request('POST UPLOAD', data=data, file=file)
-        if not response:
-          return False
-        elif response == 'retry':
-          response = self._make_request('POST UPLOAD', data=data, file=file)
-        result = response.json()
+      if filesize > self.chunk_size:
+        response, result = self._upload_file_chunks(filepath, wiki_filename, local_sha1, data)
+      else:
+        with open(filepath, 'rb') as file_stream:
+          response, result = self._post_upload(data, file={'file': (wiki_filename, file_stream, 'image/png')})
+      if result is None:
+        return False
 
-        if 'error' in result:
-          code = result['error'].get('code')
-          if code in ('fileexists-shared-forbidden', 'fileexists-forbidden', 'fileexists-no-change'):
-            self.logger.info(f'File already exists on wiki: {wiki_filename}')
-            return True
-          else:
-            self.logger.error(f'Upload error: {result.get('error')}')
-            return False
-        upload_result = result.get('upload', {}).get('result')
-        if upload_result == 'Success':
-          self.logger.info(f'File {wiki_filename} uploaded successfully')
-          result_ok = True
+      if 'error' in result:
+        code = result['error'].get('code')
+        if code in ('fileexists-shared-forbidden', 'fileexists-forbidden', 'fileexists-no-change'):
+          self.logger.info(f'File already exists on wiki: {wiki_filename}')
+          return True
         else:
-          self.logger.warning(f'Upload result: {upload_result}')
+          self.logger.error(f'Upload error: {result.get('error')}')
+          return False
+      upload_result = result.get('upload', {}).get('result')
+      if upload_result == 'Success':
+        self.logger.info(f'File {wiki_filename} uploaded successfully')
+        self.edit_limiter.success()
+        self._index_uploaded_file(wiki_filename, sha1=local_sha1, size=filesize)
+        result_ok = True
+      else:
+        self.logger.warning(f'Upload result: {upload_result}')
 
     except RequestException as e:
       self.logger.error(f'Upload failed due to request error: {e}')
@@ -520,11 +943,14 @@ class Wiki:
           self.logger.warning(f'Error while removing file after upload : {e}')
     return result_ok
   
-  def update_files_page(self, page_title='FilesPage', file_list=None):
-    """ Update the 'FilesPage' with a given list of image filenames. """
+  def build_files_page_content(self, file_list=None) -> str|None:
+    """ Build the 'FilesPage' content from a list of image filenames (sorted trait, portrait, monster, boss and spire png files)
+      Returns:
+        page content, None if there is no file to list
+    """
     if not file_list:
       self.logger.error('No files provided to update the FilesPage')
-      return False
+      return None
 
     filtered_files = [
       name for name in file_list
@@ -533,42 +959,57 @@ class Wiki:
 
     if not filtered_files:
       self.logger.error('No valid trait, portrait, monster, or boss files to add to FilesPage')
-      return False
+      return None
 
-    page_content = ' '.join(sorted(filtered_files))
-    return self.edit_request(
-      title=page_title,
-      content=page_content
-    )
-  
-  def list_all_images(self):
-    """ Return a list of all image filenames from the wiki. """
-    all_files = []
+    return ' '.join(sorted(filtered_files))
+
+  def _file_key(self, filename: str) -> str:
+    """ File name as stored by the wiki (underscores, first letter uppercase) """
+    key = filename.strip().replace(' ', '_')
+    return key[:1].upper() + key[1:]
+
+  def list_all_images(self) -> list|None:
+    """ Return a list of all image filenames from the wiki, None on error
+      Metadata of each file (sha1, size, timestamp) is kept in self.images_index, to avoid one query per file later
+    """
+    images_index = {}
     params = {
       'action': 'query',
       'list': 'allimages',
+      'aiprop': 'sha1|size|timestamp',
       'ailimit': '500',
       'format': 'json'
     }
     while True:
-      response = self._make_request('GET', params=params)
+      response = self._read_request(params)
       if not response:
         self.logger.error('Error while retrieving allimages')
-        return []
+        return None
       data = response.json()
       if 'error' in data:
         self.logger.error(f'API error in list_all_images: {data['error']}')
-        return []
+        return None
       images = data.get('query', {}).get('allimages', [])
-      all_files.extend([img.get('name') for img in images if 'name' in img])
+      for img in images:
+        if 'name' in img:
+          images_index[img.get('name')] = {'sha1': img.get('sha1'), 'size': img.get('size'), 'timestamp': img.get('timestamp')}
       if 'continue' in data:
         params.update(data['continue'])
       else:
         break
-    return all_files
+    self.images_index = images_index
+    self.logger.info(f'{len(images_index)} files indexed from {self.lang_code} wiki')
+    return list(images_index.keys())
+
+  def _index_uploaded_file(self, wiki_filename: str, sha1: str, size: int):
+    """ Keep self.images_index up to date after an upload """
+    if self.images_index is not None:
+      self.images_index[self._file_key(wiki_filename)] = {'sha1': sha1, 'size': size, 'timestamp': datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')}
   
   def _get_remote_file_size(self, filename: str):
     """Return remote file size in bytes, or None if file does not exist"""
+    if self.images_index is not None:
+      return (self.images_index.get(self._file_key(filename)) or {}).get('size')
     params = {
         'action': 'query',
         'titles': f'File:{filename}',
@@ -591,40 +1032,44 @@ class Wiki:
       self.logger.warning(f'Error while getting remote size for {filename}: {e}')
       return None
     
-  def get_pages_sha1(self, titles: list[str]) -> dict:
+  def get_pages_sha1(self, titles: list[str]) -> dict|None:
+    """ Get last revision SHA1 and id of many wiki pages at once
+      Returns:
+      - dict title -> {'sha1': XX, 'revid': XX} (None if page doesn't exist)
+      - None if there was an error
+    """
+    revisions = self._query_revisions(titles, rvprop='sha1|ids')
+    if revisions is None:
+      self.logger.warning('Error while getting pages sha1')
+      return None
     result = {}
-    try:
-      for i in range(0, len(titles), self.batch_size):
-        batch = titles[i:i+self.batch_size]
-        params = {
-          'action': 'query',
-          'format': 'json',
-          'prop': 'revisions',
-          'rvprop': 'sha1|ids',
-          'titles': '|'.join(batch)
+    for title in titles:
+      revision = revisions.get(title)
+      if revision is None:
+        result[title] = None
+      else:
+        result[title] = {
+          'sha1': revision.get('sha1'),
+          'revid': revision.get('revid')
         }
-        response = self._make_request('GET', params=params)
-        if not response:
-          return None
-        data = response.json()
-        pages = data.get('query', {}).get('pages', {})
-        for page_id, data in pages.items():
-          title = data.get('title')
-          if 'missing' in data:
-            result[title] = None
-            continue
-          revision = data.get('revisions', [{}])[0]
-          result[title] = {
-            'sha1': revision.get('sha1'),
-            'revid': revision.get('revid')
-          }
-      return result
-    except Exception as e:
-      self.logger.warning(f'Error while getting pages sha1: {e}')
+    return result
+    
+  def get_pages_revids(self, titles: list[str]) -> dict|None:
+    """ Get last revision id of many wiki pages at once
+      Returns:
+      - dict title -> revid (None if page doesn't exist)
+      - None if there was an error
+    """
+    revisions = self._query_revisions(titles, rvprop='ids')
+    if revisions is None:
+      self.logger.warning('Error while getting pages revids')
       return None
+    return {title: (revisions.get(title) or {}).get('revid') for title in titles}
     
   def get_file_sha1(self, filename: str) -> str | None:
     """Return remote file SHA1, or None if file does not exist"""
+    if self.images_index is not None:
+      return (self.images_index.get(self._file_key(filename)) or {}).get('sha1')
     params = {
       'action': 'query',
       'titles': f'File:{filename}',
@@ -0,0 +1,68 @@
+import os
+import zlib
+import threading
+
+from utils.wiki import Wiki
+from utils.retry import RetryPolicy
+from utils.metrics import RequestMetrics
+from utils.session_cache import SessionCache
+
+
+class WikiPool:
+  """ Keep logged-in Wiki sessions for the whole run (safe to share between threads)
+    - one session per language and per bot account (config.WIKI_ACCOUNTS), each with its own CSRF token and rate limiters
+    - account 0 (WIKI_USERNAME) is used for reads and uploads, edits are spread over all accounts by page title
+    - an extra account that failed to log in on a language isn't tried again during the run, account 0 edits its pages
+  """
+  def __init__(self, config, logger):
+    self.config = config
+    self.logger = logger
+    self.accounts = config.WIKI_ACCOUNTS
+    self.wikis = {}
+    self.failed = set()
+    self.retry_policy = RetryPolicy()
+    self.metrics = RequestMetrics()
+    # one session cache per account, encrypted with the password of this account
+    self.session_caches = [SessionCache(logger=logger, path=self._session_cache_path(account), secret=password) for account, (_, password) in enumerate(self.accounts)]
+    self._locks = {}
+    self._lock = threading.Lock()
+
+  def get(self, lang_code: str, account: int = 0) -> Wiki|None:
+    """ Get the wiki session for lang_code and an account index, logging in on first use
+      Returns:
+        Wiki instance ready to edit, None if connection failed
+    """
+    key = (lang_code, account)
+    with self._lock:
+      lang_lock = self._locks.setdefault(key, threading.Lock())
+    with lang_lock:
+      wiki = self.wikis.get(key)
+      if wiki:
+        return wiki
+      if key in self.failed:
+        return None
+      username, password = self.accounts[account]
+      wiki = Wiki(config=self.config, logger=self.logger, lang_code=lang_code, retry_policy=self.retry_policy, metrics=self.metrics, session_cache=self.session_caches[account], read_concurrency=self.config.WIKI_READ_CONCURRENCY, username=username, password=password)
+      if not wiki.initialize():
+        self.logger.error(f'Failed to initialize {lang_code} wiki connection for {username}')
+        if account:
+          self.failed.add(key)
+          self.logger.warning(f'{username} won\'t be used again on {lang_code} wiki during this run, its pages are edited by {self.accounts[0][0]}')
+        return None
+      self.wikis[key] = wiki
+      return wiki
+
+  def _session_cache_path(self, account: int) -> str:
+    """ WIKI_SESSION_CACHE_FILE for account 0, numbered files (wiki_sessions_1.json ...) for extra accounts """
+    if not account:
+      return self.config.WIKI_SESSION_CACHE_FILE
+    root, ext = os.path.splitext(self.config.WIKI_SESSION_CACHE_FILE)
+    return f'{root}_{account}{ext}'
+
+  def account_for(self, title: str) -> int:
+    """ Stable account index for a page title, so a page is always edited by the same account """
+    return zlib.crc32(title.encode('utf-8')) % len(self.accounts)
+
+  def get_editor(self, lang_code: str, account: int) -> Wiki|None:
+    """ Get the wiki session of an account to edit pages (account 0 if this account couldn't connect) """
+    return (account and self.get(lang_code, account)) or self.get(lang_code)
@@ -0,0 +1,432 @@
+""" Local stand-in for the MediaWiki API subset used by utils/wiki.py, to benchmark the wiki stage offline
+
+  run it:  py -m utils.wiki_standin --port 8089 --latency 0.05 --error-rate 0.01 --edit-limit 90/60
+  then:    py main.py --wiki-url http://127.0.0.1:8089/
+
+  Supported: query (meta=tokens|userinfo, prop=revisions|imageinfo, list=allimages), login, edit (whole page or section=N), upload (single and chunked)
+  Each language wiki lives under its own path (/api.php for en, /fr/api.php for fr ...), all data is kept in memory
+"""
+import argparse
+import email
+import hashlib
+import json
+import random
+import re
+import secrets
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+
+def _now() -> str:
+  return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def _normalize_title(title: str) -> str:
+  title = title.strip().replace('_', ' ')
+  return title[:1].upper() + title[1:]
+
+
+# Deliberately written apart from utils.wikitext.replace_section: the stand-in checks the section edits planned by the client,
+# so it must not share its code (and its bugs). Keep it to the bare MediaWiki rule.
+def _replace_section(text: str, section: int, new_text: str) -> str|None:
+  """ MediaWiki section replacement: section N runs from its heading to the next heading of the same or higher level,
+    the new text is followed by a blank line
+  """
+  lines = text.split('\n')
+  headings = []
+  for i, line in enumerate(lines):
+    match = re.match(r'^(={1,6})(.+?)(={1,6})[ \t]*$', line)
+    if match and match.group(2).strip():
+      headings.append((i, min(len(match.group(1)), len(match.group(3)))))
+  if section > len(headings):
+    return None
+  if section == 0:
+    start, end = 0, headings[0][0] if headings else len(lines)
+  else:
+    start, level = headings[section - 1]
+    end = next((i for i, l in headings[section:] if l <= level), len(lines))
+  before = ''.join(f'{line}\n' for line in lines[:start])
+  after = '\n'.join(lines[end:])
+  return f'{before}{new_text}\n\n{after}' if new_text else f'{before}{after}'
+
+
+class StandinWiki:
+  """ In-memory content of one language wiki """
+  def __init__(self):
+    self.pages = {}
+    self.files = {}
+    self.stash = {}
+
+
+class StandinState:
+  """ All wikis, sessions and server behaviour settings """
+  def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, lag=0, edit_limit=None, max_result_size=8388608, high_limits=True):
+    self.latency = latency
+    self.jitter = jitter
+    self.error_rate = error_rate
+    self.lag = lag
+    self.edit_limit = edit_limit
+    self.max_result_size = max_result_size
+    self.high_limits = high_limits
+    self.wikis = {}
+    self.sessions = {}
+    self.next_revid = 1
+    self.stats = Counter()
+    self.lock = threading.Lock()
+
+  def wiki(self, lang_code: str) -> StandinWiki:
+    if lang_code not in self.wikis:
+      self.wikis[lang_code] = StandinWiki()
+    return self.wikis[lang_code]
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+  """ Answer API requests like MediaWiki would (format=json, formatversion=1) """
+  state: StandinState = None
+
+  def log_message(self, format, *args):
+    pass
+
+  """ HTTP plumbing """
+
+  def do_GET(self):
+    url = urlparse(self.path)
+    params = {k: v[-1] for k, v in parse_qs(url.query, keep_blank_values=True).items()}
+    self._handle(url.path, params, files={})
+
+  def do_POST(self):
+    url = urlparse(self.path)
+    length = int(self.headers.get('Content-Length', 0))
+    body = self.rfile.read(length)
+    content_type = self.headers.get('Content-Type', '')
+    params = {}
+    files = {}
+    if content_type.startswith('multipart/form-data'):
+      message = email.message_from_bytes(f'Content-Type: {content_type}\r\n\r\n'.encode() + body)
+      for part in message.get_payload():
+        name = part.get_param('name', header='content-disposition')
+        payload = part.get_payload(decode=True) or b''
+        if part.get_filename() is not None:
+          files[name] = payload
+        else:
+          params[name] = payload.decode('utf-8')
+    else:
+      params = {k: v[-1] for k, v in parse_qs(body.decode('utf-8'), keep_blank_values=True).items()}
+    self._handle(url.path, params, files)
+
+  def _send_json(self, data: dict, status=200, headers=None):
+    body = json.dumps(data).encode('utf-8')
+    self.send_response(status)
+    self.send_header('Content-Type', 'application/json; charset=utf-8')
+    self.send_header('Content-Length', str(len(body)))
+    for key, value in (headers or {}).items():
+      self.send_header(key, value)
+    if self._new_session:
+      self.send_header('Set-Cookie', f'standin_session={self._session_id}; Path=/')
+    self.end_headers()
+    self.wfile.write(body)
+    with self.state.lock:
+      self.state.stats['bytes_out'] += len(body)
+
+  def _get_session(self) -> dict:
+    cookies = dict(c.strip().split('=', 1) for c in self.headers.get('Cookie', '').split(';') if '=' in c)
+    session_id = cookies.get('standin_session')
+    self._new_session = session_id not in self.state.sessions
+    if self._new_session:
+      session_id = secrets.token_hex(8)
+      self.state.sessions[session_id] = {'user': None, 'logintoken': secrets.token_hex(8), 'csrftoken': secrets.token_hex(8) + '+\\', 'edits': []}
+    self._session_id = session_id
+    return self.state.sessions[session_id]
+
+  def _handle(self, path: str, params: dict, files: dict):
+    parts = [p for p in path.split('/') if p]
+    if not parts or parts[-1] != 'api.php' or len(parts) > 2:
+      self.send_error(404)
+      return
+    lang_code = parts[0] if len(parts) == 2 else 'en'
+    action = params.get('action', 'query')
+    delay = self.state.latency + random.uniform(0, self.state.jitter)
+    if delay:
+      time.sleep(delay)
+
+    headers = None
+    with self.state.lock:
+      self.state.stats[f'requests.{action}'] += 1
+      session = self._get_session()
+      if random.random() < self.state.error_rate:
+        self.state.stats['injected_5xx'] += 1
+        data = None
+      elif self.state.lag and 'maxlag' in params and float(params['maxlag']) < self.state.lag:
+        self.state.stats['maxlag'] += 1
+        data = {'error': {'code': 'maxlag', 'info': f'Waiting for a database server: {self.state.lag} seconds lagged.'}}
+        headers = {'Retry-After': '1', 'X-Database-Lag': str(self.state.lag)}
+      else:
+        handler = getattr(self, f'_action_{action}', None)
+        if handler is None:
+          data = {'error': {'code': 'badvalue', 'info': f'Unrecognized value for parameter "action": {action}.'}}
+        else:
+          data = handler(self.state.wiki(lang_code), session, params, files)
+          headers = data.pop('_headers', None)
+
+    if data is None:
+      self.send_response(503)
+      self.send_header('Content-Length', '0')
+      self.end_headers()
+      return
+    self._send_json(data, headers=headers)
+
+  """ API actions (called with state.lock held) """
+
+  def _action_query(self, wiki: StandinWiki, session: dict, params: dict, files: dict) -> dict:
+    if params.get('assert') == 'user' and not session['user']:
+      return {'error': {'code': 'assertuserfailed', 'info': 'You are no longer logged in, so the action could not be completed.'}}
+    query = {}
+    result = {'batchcomplete': ''}
+    meta = params.get('meta', '').split('|')
+    if 'tokens' in meta:
+      if params.get('type') == 'login':
+        query['tokens'] = {'logintoken': session['logintoken']}
+      else:
+        query['tokens'] = {'csrftoken': session['csrftoken'] if session['user'] else '+\\'}
+    if 'userinfo' in meta:
+      userinfo = {'id': 1 if session['user'] else 0, 'name': session['user'] or '127.0.0.1'}
+      uiprop = params.get('uiprop', '').split('|')
+      if 'rights' in uiprop:
+        userinfo['rights'] = ['read', 'edit', 'upload'] + (['apihighlimits'] if self.state.high_limits and session['user'] else [])
+      if 'ratelimits' in uiprop:
+        hits, seconds = self.state.edit_limit or (None, None)
+        userinfo['ratelimits'] = {'edit': {'user': {'hits': hits, 'seconds': seconds}}} if hits else {}
+      query['userinfo'] = userinfo
+    if params.get('titles'):
+      self._query_pages(wiki, session, params, query, result)
+    if params.get('list') == 'allimages':
+      self._query_allimages(wiki, params, query, result)
+    if query:
+      result['query'] = query
+    return result
+
+  def _query_pages(self, wiki: StandinWiki, session: dict, params: dict, query: dict, result: dict):
+    titles = params['titles'].split('|')
+    max_titles = 500 if self.state.high_limits and session['user'] else 50
+    if len(titles) > max_titles:
+      result['warnings'] = {'query': {'*': f'Too many values supplied for parameter "titles". The limit is {max_titles}.'}}
+      titles = titles[:max_titles]
+    normalized = []
+    pages = {}
+    found = []
+    prop = params.get('prop', '').split('|')
+    missing_id = -1
+    for title in titles:
+      norm = _normalize_title(title)
+      if norm != title:
+        normalized.append({'from': title, 'to': norm})
+      if title.startswith('File:') and 'imageinfo' in prop:
+        pages.update(self._imageinfo(wiki, norm, params, missing_id))
+        missing_id -= 1
+      elif norm in wiki.pages:
+        found.append(norm)
+        pages[str(wiki.pages[norm]['pageid'])] = {'pageid': wiki.pages[norm]['pageid'], 'ns': 0, 'title': norm}
+      else:
+        pages[str(missing_id)] = {'ns': 0, 'title': norm, 'missing': ''}
+        missing_id -= 1
+
+    if 'revisions' in prop:
+      rvprop = params.get('rvprop', 'ids|timestamp|flags|comment|user').split('|')
+      rvcontinue = int(params.get('rvcontinue', '0') or 0)
+      size = 0
+      for page in sorted((wiki.pages[t] for t in found), key=lambda p: p['pageid']):
+        if page['pageid'] < rvcontinue:
+          continue
+        revision = {}
+        if 'ids' in rvprop:
+          revision.update({'revid': page['revid'], 'parentid': page['parentid']})
+        if 'sha1' in rvprop:
+          revision['sha1'] = page['sha1']
+        if 'timestamp' in rvprop:
+          revision['timestamp'] = page['timestamp']
+        if 'content' in rvprop:
+          if size and size + len(page['content']) > self.state.max_result_size:
+            result['continue'] = {'rvcontinue': str(page['pageid']), 'continue': '||'}
+            break
+          size += len(page['content'])
+          revision['slots'] = {'main': {'contentmodel': 'wikitext', 'contentformat': 'text/x-wiki', '*': page['content']}}
+        pages[str(page['pageid'])]['revisions'] = [revision]
+    if normalized:
+      query['normalized'] = normalized
+    query['pages'] = pages
+
+  def _imageinfo(self, wiki: StandinWiki, title: str, params: dict, missing_id: int) -> dict:
+    name = title.split(':', 1)[1].replace(' ', '_')
+    file = wiki.files.get(name)
+    if file is None:
+      return {str(missing_id): {'ns': 6, 'title': title, 'missing': '', 'imagerepository': ''}}
+    iiprop = params.get('iiprop', 'timestamp|user').split('|')
+    info = {key: file[key] for key in ('sha1', 'size', 'timestamp') if key in iiprop}
+    if 'url' in iiprop:
+      info['url'] = f'http://{self.headers.get("Host")}/images/{name}'
+    return {str(file['pageid']): {'ns': 6, 'title': title, 'imagerepository': 'local', 'imageinfo': [info]}}
+
+  def _query_allimages(self, wiki: StandinWiki, params: dict, query: dict, result: dict):
+    limit = min(int(params.get('ailimit', '10')), 500)
+    aiprop = params.get('aiprop', 'timestamp|url').split('|')
+    start = params.get('aicontinue', '')
+    names = sorted(n for n in wiki.files if n >= start)
+    images = []
+    for name in names[:limit]:
+      image = {'name': name, 'title': f'File:{name.replace("_", " ")}'}
+      image.update({key: wiki.files[name][key] for key in ('sha1', 'size', 'timestamp') if key in aiprop})
+      images.append(image)
+    if len(names) > limit:
+      result['continue'] = {'aicontinue': names[limit], 'continue': '-||'}
+    query['allimages'] = images
+
+  def _action_login(self, wiki: StandinWiki, session: dict, params: dict, files: dict) -> dict:
+    if params.get('lgtoken') != session['logintoken']:
+      return {'login': {'result': 'WrongToken'}}
+    if not params.get('lgname') or not params.get('lgpassword'):
+      return {'login': {'result': 'Failed', 'reason': 'Incorrect username or password entered.'}}
+    session['user'] = params['lgname'].split('@')[0]
+    return {'login': {'result': 'Success', 'lguserid': 1, 'lgusername': session['user']}}
+
+  def _check_write(self, session: dict, params: dict) -> dict|None:
+    """ Common checks for edit and upload: login, token, rate limit """
+    if not session['user']:
+      return {'error': {'code': 'permissiondenied', 'info': 'You must be logged in.'}}
+    if params.get('token') != session['csrftoken']:
+      return {'error': {'code': 'badtoken', 'info': 'Invalid CSRF token.'}}
+    if self.state.edit_limit:
+      hits, seconds = self.state.edit_limit
+      now = time.monotonic()
+      session['edits'] = [t for t in session['edits'] if now - t < seconds]
+      if len(session['edits']) >= hits:
+        self.state.stats['ratelimited'] += 1
+        retry_after = seconds - (now - session['edits'][0])
+        return {'error': {'code': 'ratelimited', 'info': "As an anti-abuse measure, you are limited from performing this action too many times in a short space of time."}, '_headers': {'Retry-After': str(int(retry_after) + 1)}}
+      session['edits'].append(now)
+    return None
+
+  def _action_edit(self, wiki: StandinWiki, session: dict, params: dict, files: dict) -> dict:
+    error = self._check_write(session, params)
+    if error:
+      return error
+    title = _normalize_title(params.get('title', ''))
+    if not title:
+      return {'error': {'code': 'missingtitle', 'info': 'The page you specified doesn\'t exist.'}}
+    text = params.get('text', '').rstrip()
+    page = wiki.pages.get(title)
+    if params.get('section') not in (None, ''):
+      if page is None:
+        return {'error': {'code': 'missingtitle', 'info': 'The page you specified doesn\'t exist.'}}
+      text = _replace_section(page['content'], int(params['section']), text)
+      if text is None:
+        return {'error': {'code': 'nosuchsection', 'info': f'There is no section {params["section"]}.'}}
+      text = text.rstrip()
+      self.state.stats['edits.sections'] += 1
+    if page is not None and page['content'] == text:
+      self.state.stats['edits.nochange'] += 1
+      return {'edit': {'result': 'Success', 'pageid': page['pageid'], 'title': title, 'contentmodel': 'wikitext', 'nochange': ''}}
+    revid = self.state.next_revid
+    self.state.next_revid += 1
+    old_revid = page['revid'] if page else 0
+    wiki.pages[title] = {
+      'pageid': page['pageid'] if page else revid,
+      'revid': revid,
+      'parentid': old_revid,
+      'content': text,
+      'sha1': hashlib.sha1(text.encode('utf-8')).hexdigest(),
+      'timestamp': _now()
+    }
+    self.state.stats['edits'] += 1
+    self.state.stats['edits.bytes'] += len(text.encode('utf-8'))
+    result = {'result': 'Success', 'pageid': wiki.pages[title]['pageid'], 'title': title, 'contentmodel': 'wikitext', 'oldrevid': old_revid, 'newrevid': revid, 'newtimestamp': wiki.pages[title]['timestamp']}
+    if page is None:
+      result['new'] = ''
+    return {'edit': result}
+
+  def _action_upload(self, wiki: StandinWiki, session: dict, params: dict, files: dict) -> dict:
+    error = self._check_write(session, params)
+    if error:
+      return error
+    filename = params.get('filename', '').replace(' ', '_')
+    if params.get('stash') and 'chunk' in files:
+      filekey = params.get('filekey') or f'{secrets.token_hex(6)}.{filename}'
+      offset = int(params.get('offset', 0))
+      stashed = wiki.stash.get(filekey)
+      if params.get('filekey') and stashed is None:
+        return {'error': {'code': 'stashnosuchfilekey', 'info': f'No such filekey: {filekey}.'}}
+      stashed = stashed or bytearray()
+      if offset != len(stashed):
+        return {'error': {'code': 'stashfailed', 'info': f'Invalid chunk offset {offset}, expected {len(stashed)}.'}}
+      stashed.extend(files['chunk'])
+      wiki.stash[filekey] = stashed
+      self.state.stats['upload.chunks'] += 1
+      if len(stashed) >= int(params.get('filesize', 0)):
+        return {'upload': {'result': 'Success', 'filekey': filekey, 'sessionkey': filekey}}
+      return {'upload': {'result': 'Continue', 'offset': len(stashed), 'filekey': filekey}}
+    if params.get('filekey'):
+      content = wiki.stash.pop(params['filekey'], None)
+      if content is None:
+        return {'error': {'code': 'stashnosuchfilekey', 'info': f'No such filekey: {params["filekey"]}.'}}
+      content = bytes(content)
+    elif 'file' in files:
+      content = files['file']
+    else:
+      return {'error': {'code': 'missingparam', 'info': 'One of the parameters "filekey", "file" and "url" is required.'}}
+    if not filename:
+      return {'error': {'code': 'missingparam', 'info': 'The "filename" parameter must be set.'}}
+    sha1 = hashlib.sha1(content).hexdigest()
+    existing = wiki.files.get(filename)
+    if existing and existing['sha1'] == sha1:
+      return {'error': {'code': 'fileexists-no-change', 'info': 'The upload is an exact duplicate of the current version of [[:File:' + filename + ']].'}}
+    pageid = existing['pageid'] if existing else self.state.next_revid
+    self.state.next_revid += 1
+    wiki.files[filename] = {'pageid': pageid, 'sha1': sha1, 'size': len(content), 'timestamp': _now()}
+    self.state.stats['uploads'] += 1
+    self.state.stats['uploads.bytes'] += len(content)
+    return {'upload': {'result': 'Success', 'filename': filename, 'imageinfo': dict(wiki.files[filename])}}
+
+
+def _parse_edit_limit(value: str):
+  hits, seconds = value.split('/')
+  return int(hits), float(seconds)
+
+
+def create_server(host='127.0.0.1', port=8089, **settings) -> ThreadingHTTPServer:
+  """ Create (not started) stand-in server, settings are StandinState arguments """
+  handler = type('Handler', (StandinHandler,), {'state': StandinState(**settings)})
+  return ThreadingHTTPServer((host, port), handler)
+
+
+def main():
+  parser = argparse.ArgumentParser(prog='wiki_standin', description='Local MediaWiki API stand-in to benchmark the wiki stage offline')
+  parser.add_argument('--host', default='127.0.0.1')
+  parser.add_argument('--port', type=int, default=8089)
+  parser.add_argument('--latency', type=float, default=0.0, help='delay added to every request, in seconds')
+  parser.add_argument('--jitter', type=float, default=0.0, help='random extra delay (0 to jitter seconds)')
+  parser.add_argument('--error-rate', type=float, default=0.0, help='probability of answering a 503 server error')
+  parser.add_argument('--lag', type=int, default=0, help='simulated replication lag in seconds (maxlag errors if higher than the maxlag parameter)')
+  parser.add_argument('--edit-limit', type=_parse_edit_limit, default=None, help='edits and uploads allowed per session, ex: 90/60 (90 per 60s)')
+  parser.add_argument('--no-high-limits', action='store_true', help='do not grant apihighlimits (50 titles per query)')
+  args = parser.parse_args()
+
+  server = create_server(host=args.host, port=args.port, latency=args.latency, jitter=args.jitter, error_rate=args.error_rate, lag=args.lag, edit_limit=args.edit_limit, high_limits=not args.no_high_limits)
+  print(f'Wiki stand-in listening on http://{args.host}:{args.port}/ (Ctrl+C to stop)')
+  started = time.monotonic()
+  try:
+    server.serve_forever()
+  except KeyboardInterrupt:
+    pass
+  finally:
+    server.server_close()
+    stats = server.RequestHandlerClass.state.stats
+    print(f'Served for {time.monotonic() - started:.1f}s')
+    for key in sorted(stats):
+      print(f'  {key}: {stats[key]}')
+
+
+if __name__ == '__main__':
+  main()
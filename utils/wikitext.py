@@ -0,0 +1,94 @@
+import re
+import unicodedata
+from typing import List, Tuple
+
+HEADING_PATTERN = re.compile(r'^(={1,6})(.+?)(={1,6})[ \t]*$')
+# sections can't be reliably numbered if headings may be hidden in these tags
+UNSAFE_TAGS = ('<nowiki', '<pre', '<!--', '<source', '<syntaxhighlight', '<includeonly', '<noinclude', '<onlyinclude')
+INTERLANGUAGE_LINK_PATTERN = re.compile(r'^\[\[[a-z]{2,3}(-[a-z]+)*:[^\[\]|]+\]\]$')
+
+
+def canonicalize(text: str) -> str:
+  """ Canonical form of wikitext, without differences which don't change the rendered page:
+    - LF newlines, no trailing spaces at the end of lines and of the page, unicode NFC
+    - interlanguage links at the end of the page ([[fr:Title]] lines) sorted by language code
+  """
+  text = unicodedata.normalize('NFC', text.replace('\r\n', '\n').replace('\r', '\n'))
+  lines = [line.rstrip() for line in text.rstrip().split('\n')]
+  links_start = len(lines)
+  while links_start > 0 and INTERLANGUAGE_LINK_PATTERN.match(lines[links_start - 1]):
+    links_start -= 1
+  lines[links_start:] = sorted(lines[links_start:])
+  return '\n'.join(lines)
+
+
+def _split_lines(text: str) -> List[Tuple[int, List[str]]]|None:
+  if any(tag in text for tag in UNSAFE_TAGS):
+    return None
+  sections = [(0, [])]
+  for line in text.split('\n'):
+    match = HEADING_PATTERN.match(line)
+    if match and match.group(2).strip():
+      sections.append((min(len(match.group(1)), len(match.group(3))), [line]))
+    else:
+      sections[-1][1].append(line)
+  return sections
+
+
+def split_sections(text: str) -> List[Tuple[int, str]]|None:
+  """ Split wikitext into flat sections the way MediaWiki numbers them (section 0 is the text before the first heading)
+    Returns:
+      list of (heading level, text) with level 0 for section 0, None if sections can't be reliably found
+  """
+  sections = _split_lines(text)
+  if sections is None:
+    return None
+  return [(level, '\n'.join(lines)) for level, lines in sections]
+
+
+def _section_block(sections: List[Tuple[int, str]], index: int) -> Tuple[int, int]:
+  """ Range of flat sections edited with section=index (the section and its subsections) """
+  if index == 0:
+    return 0, 1
+  end = index + 1
+  while end < len(sections) and sections[end][0] > sections[index][0]:
+    end += 1
+  return index, end
+
+
+def replace_section(text: str, index: int, new_text: str) -> str|None:
+  """ Page text after an edit of section `index` with new_text, as MediaWiki builds it
+    (the replaced section is followed by a blank line, the whole page is right-trimmed on save)
+  """
+  sections = _split_lines(text)
+  if sections is None or index >= len(sections):
+    return None
+  start, end = _section_block(sections, index)
+  before = ''.join(f'{line}\n' for _, lines in sections[:start] for line in lines)
+  after = '\n'.join(line for _, lines in sections[end:] for line in lines)
+  return f'{before}{new_text.rstrip()}\n\n{after}'.rstrip() if new_text.strip() else f'{before}{after}'.rstrip()
+
+
+def plan_section_edit(current: str, new: str) -> Tuple[int, str]|None:
+  """ Find if an update of a page from current to new content can be made by editing only one section
+    Returns:
+      (section index, section text to send), None if a whole page edit is needed
+  """
+  current_sections = split_sections(current.rstrip())
+  new_sections = split_sections(new.rstrip())
+  if not current_sections or not new_sections or len(new_sections) < 2 or len(current_sections) != len(new_sections):
+    return None
+  if [level for level, _ in current_sections] != [level for level, _ in new_sections]:
+    return None
+
+  changed = [i for i, (a, b) in enumerate(zip(current_sections, new_sections)) if a[1] != b[1]]
+  if not changed:
+    return None
+  index = changed[0]
+  start, end = _section_block(new_sections, index)
+  if changed[-1] >= end:
+    return None
+  section_text = '\n'.join(t for _, t in new_sections[start:end])
+  if replace_section(current.rstrip(), index, section_text) != new.rstrip():
+    return None
+  return index, section_text.rstrip()